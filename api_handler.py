@@ -1,45 +1,369 @@
-import google.generativeai as genai
+import json
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from llm_backends import GeminiBackend
+from report_builder import ReportCancelled
+from request_scheduler import RequestScheduler
+
+SUMMARY_PROMPT = """im going to give you the details of an event by the NSS Unit of Atlas SkillTech University. I need u to make a report for it which includes 2 paragraphs (dont mention paragraph 1, paragraph 2 etc, and it should be 200 words), each with a few lines about what took place, what was discussed, and mention The NSS Unit Of Atlas SkillTech University. here are the details: """
+
+TAKEAWAY_PROMPT = """Based on the event description given, identify exactly four key takeaways related to the event. Keep it a line or two each. Focus on the specific difficulties, dilemmas, and impacts discussed, rather than just general event outcomes. Format each takeaway with a title and description separated by a colon, without any asterisks (use numbers). Do not include the phrase 'Key Takeaways'. Example format:
+                Takeaway Title: Takeaway"""
+
+REPORT_CONTENT_PROMPT = """im going to give you the details of an event by the NSS Unit of Atlas SkillTech University. Reply with JSON only.
+"summary": a report of the event in 2 paragraphs separated by a blank line (dont mention paragraph 1, paragraph 2 etc, and it should be 200 words), each with a few lines about what took place, what was discussed, and mention The NSS Unit Of Atlas SkillTech University.
+"takeaways": exactly four key takeaways, each with a short "title" and a "description" of a line or two. Focus on the specific difficulties, dilemmas, and impacts discussed, rather than just general event outcomes. No asterisks or numbering.
+here are the details: """
+
+CHUNK_NOTES_PROMPT = """This is part {part} of {parts} of the notes from an event by the NSS Unit of Atlas SkillTech University, such as a day of a camp or part of a talk. Write plain notes of at most 150 words on this part only: what took place, what was discussed, who was involved, and any difficulties, dilemmas or impacts raised. No headings or asterisks. here are the details: """
+
+# Long descriptions are summarised in chunks first (map), then the notes are summarised as usual (reduce)
+CHARS_PER_TOKEN = 4
+CHUNK_TOKENS = 3000
+LONG_INPUT_TOKENS = 6000
+MAP_CONCURRENCY = 4
+MAX_REDUCE_ROUNDS = 3
+
+REPORT_CONTENT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'summary': {'type': 'string'},
+        'takeaways': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'title': {'type': 'string'},
+                    'description': {'type': 'string'},
+                },
+                'required': ['title', 'description'],
+            },
+        },
+    },
+    'required': ['summary', 'takeaways'],
+}
+
+def estimate_tokens(text):
+    """A rough token count (about four characters per token) for sizing requests before sending."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    """Splits text into chunks of at most about max_tokens, breaking between paragraphs, then
+    lines, then sentences, and only splitting words apart when nothing else fits."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+
+    def pieces(block, separators):
+        if len(block) <= max_chars:
+            return [block]
+        if not separators:
+            return [block[i:i + max_chars] for i in range(0, len(block), max_chars)]
+        separator, rest = separators[0], separators[1:]
+        return [piece for part in re.split(separator, block) if part.strip()
+                for piece in pieces(part, rest)]
+
+    chunks, current = [], ""
+    for piece in pieces(text.strip(), [r'\n\s*\n', r'\n', r'(?<=[.!?])\s+', r'\s+']):
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def parse_takeaway(line):
+    """Splits a 'Title: Description' line into a takeaway dict."""
+    if ':' in line:
+        title, description = line.split(':', 1)
+        return {'title': title.strip(), 'description': description.strip()}
+    return {'title': '', 'description': line.strip()}
+
+def parse_takeaways(response_text):
+    """Turns a 'Title: Description' line per takeaway into a list of takeaway dicts."""
+    takeaways = []
+    for line in response_text.split('\n'):
+        line = line.strip()
+        if line and not line.startswith(('•', '-', '*')):
+            line = line.replace('*', '')
+            takeaways.append(parse_takeaway(line))
+    return takeaways
+
+def parse_edited_takeaways(text):
+    """Turns the reviewed takeaways text into takeaway dicts, keeping every non-empty line.
+
+    Unlike parse_takeaways, bulleted and numbered lines are kept; the bullet, number and
+    ** markers are stripped instead.
+    """
+    takeaways = []
+    for line in text.split('\n'):
+        line = re.sub(r'^(?:•\s*|[-*]\s+|\d+[.)]\s+)', '', line.strip()).replace('**', '').strip()
+        if line:
+            takeaways.append(parse_takeaway(line))
+    return takeaways
+
+def parse_report_content(response_text):
+    """Parses and validates the structured summary/takeaways reply against REPORT_CONTENT_SCHEMA."""
+    try:
+        data = json.loads(response_text)
+    except ValueError as e:
+        raise ValueError(f"Model did not return valid JSON: {str(e)}")
+
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object with 'summary' and 'takeaways'")
+    summary = data.get('summary')
+    if not isinstance(summary, str) or not summary.strip():
+        raise ValueError("'summary' must be a non-empty string")
+    takeaways = data.get('takeaways')
+    if not isinstance(takeaways, list) or not takeaways:
+        raise ValueError("'takeaways' must be a non-empty list")
+
+    cleaned = []
+    for takeaway in takeaways:
+        if not isinstance(takeaway, dict):
+            raise ValueError("Each takeaway must be an object with 'title' and 'description'")
+        title, description = takeaway.get('title'), takeaway.get('description')
+        if not isinstance(title, str) or not isinstance(description, str):
+            raise ValueError("Each takeaway needs a string 'title' and 'description'")
+        cleaned.append({'title': title.strip().rstrip(':'), 'description': description.strip()})
+
+    return summary.strip(), cleaned
 
 class APIHandler:
-    def __init__(self, model_name='gemini-2.0-flash-lite'):
-        self.model_name = model_name
-        self.model = None
+    """Summaries and takeaways from a pluggable LLM backend (Gemini by default).
+
+    Every request goes through a RequestScheduler, which applies the rate limit, retries
+    429s and transient errors with backoff, and enforces `timeout` as a deadline.
+
+    Descriptions longer than `long_input_tokens` are condensed first: split into chunks of
+    `chunk_tokens`, summarised `map_concurrency` at a time, and the joined notes are then
+    used in place of the description.
+    """
+
+    def __init__(self, model_name='gemini-2.0-flash-lite', timeout=60, cache=None, structured_output=True,
+                 backend=None, scheduler=None, chunk_tokens=CHUNK_TOKENS,
+                 long_input_tokens=LONG_INPUT_TOKENS, map_concurrency=MAP_CONCURRENCY):
+        self.backend = backend or GeminiBackend(model_name)
+        self.timeout = timeout
+        self.cache = cache
+        self.structured_output = structured_output
+        self.scheduler = scheduler or RequestScheduler()
+        self.chunk_tokens = chunk_tokens
+        self.long_input_tokens = long_input_tokens
+        self.map_concurrency = map_concurrency
+
+    @property
+    def model_name(self):
+        return self.backend.model_name
+
+    @property
+    def model(self):
+        """The ready backend, or None until initialize_model has succeeded."""
+        return self.backend if self.backend.ready else None
+
+    def initialize_model(self, api_key=None):
+        self.backend.configure(api_key)
+
+    def _request(self, prompt, text, request, timeout=None, refresh=False, parse=None,
+                 telemetry=None, kind='generate', on_text=None):
+        # Sends request(remaining_timeout) -> (reply, usage) through the scheduler. Responses are
+        # cached on model, prompt and description; refresh skips the lookup but still stores the
+        # new response. Only replies that parse are cached. Streamed replies share the cache, and
+        # on_text gets a cached reply in one piece.
+        start = time.perf_counter()
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(self.model_name, prompt, text)
+            if not refresh:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    if telemetry:
+                        telemetry.record_api_call(kind, time.perf_counter() - start, cached=True)
+                    if on_text:
+                        on_text(cached)
+                    return parse(cached) if parse else cached
+
+        timeout = timeout or self.timeout
+        try:
+            (response_text, usage), retries = self.scheduler.call(request, timeout,
+                                                                   self.backend.is_retryable)
+        except Exception as e:
+            if telemetry:
+                telemetry.record_api_call(kind, time.perf_counter() - start,
+                                          getattr(e, 'retries', 0), error=str(e))
+            raise
+        if telemetry:
+            telemetry.record_api_call(kind, time.perf_counter() - start, retries, usage)
+        result = parse(response_text) if parse else response_text
+        if key is not None:
+            self.cache.put(key, response_text)
+        return result
+
+    def _generate(self, prompt, text, timeout=None, refresh=False, schema=None, parse=None,
+                  telemetry=None, kind='generate'):
+        return self._request(prompt, text,
+                             lambda remaining: self.backend.generate(prompt, remaining, schema),
+                             timeout, refresh, parse, telemetry, kind)
 
-    def initialize_model(self, api_key):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(self.model_name)
+    def _consume_stream(self, prompt, timeout, on_text):
+        """Reads one streamed reply, passing the text so far to on_text after every chunk."""
+        chunks = self.backend.stream(prompt, timeout)
+        parts = []
+        while True:
+            try:
+                parts.append(next(chunks))
+            except StopIteration as stop:
+                return "".join(parts), stop.value or {}
+            on_text("".join(parts))
 
-    def get_summary(self, text):
+    def _stream(self, prompt, text, on_text, timeout, refresh, telemetry, kind, error):
+        # A retried attempt starts on_text again from the beginning of the new reply
+        try:
+            return self._request(prompt, text,
+                                 lambda remaining: self._consume_stream(prompt, remaining, on_text),
+                                 timeout, refresh, None, telemetry, kind, on_text)
+        except ReportCancelled:
+            # Raised by on_text to stop the stream; not an API error
+            raise
+        except Exception as e:
+            raise Exception(f"{error}: {str(e)}")
+
+    def estimate_request(self, text):
+        """The input tokens and number of requests a description will take, before anything is sent.
+
+        For long inputs the notes handed to the final requests are assumed to be about 200
+        tokens per chunk.
+        """
+        tokens = estimate_tokens(text)
+        if self.structured_output:
+            final_prompts = [REPORT_CONTENT_PROMPT]
+        else:
+            final_prompts = [SUMMARY_PROMPT, TAKEAWAY_PROMPT]
+        chunks = 0
+        map_tokens = 0
+        final_input = tokens
+        if tokens > self.long_input_tokens:
+            chunks = len(split_into_chunks(text, self.chunk_tokens))
+            map_tokens = tokens + chunks * estimate_tokens(CHUNK_NOTES_PROMPT)
+            final_input = min(tokens, chunks * 200)
+        final_tokens = sum(estimate_tokens(prompt) + final_input for prompt in final_prompts)
+        return {'tokens': tokens, 'chunks': chunks, 'requests': chunks + len(final_prompts),
+                'prompt_tokens': map_tokens + final_tokens}
+
+    def condense(self, text, timeout=None, refresh=False, telemetry=None):
+        """Returns short text as it is; long text is replaced by notes summarised chunk by chunk,
+        repeating while the notes are still too long and keep getting shorter."""
         if not self.model:
             return text
 
+        timeout = timeout or self.timeout
+        for _ in range(MAX_REDUCE_ROUNDS):
+            tokens = estimate_tokens(text)
+            if tokens <= self.long_input_tokens:
+                break
+            notes = self._summarize_chunks(split_into_chunks(text, self.chunk_tokens), timeout,
+                                           refresh, telemetry)
+            if estimate_tokens(notes) >= tokens:
+                break
+            text = notes
+        return text
+
+    def _summarize_chunks(self, chunks, timeout, refresh, telemetry):
+        def summarize(part, chunk):
+            prompt = CHUNK_NOTES_PROMPT.format(part=part, parts=len(chunks)) + chunk
+            return self._generate(prompt, chunk, timeout, refresh, telemetry=telemetry,
+                                  kind='chunk_notes').strip()
+
+        executor = ThreadPoolExecutor(max_workers=max(1, self.map_concurrency))
         try:
-            prompt = f"""im going to give you the details of an event by the NSS Unit of Atlas SkillTech University. I need u to make a report for it which includes 2 paragraphs (dont mention paragraph 1, paragraph 2 etc, and it should be 200 words), each with a few lines about what took place, what was discussed, and mention The NSS Unit Of Atlas SkillTech University. here are the details: {text}"""
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            futures = [executor.submit(summarize, part, chunk) for part, chunk in enumerate(chunks, 1)]
+            try:
+                notes = [future.result(timeout=timeout) for future in futures]
+            except FutureTimeoutError:
+                raise Exception(f"The model did not respond within {timeout} seconds")
+            except Exception as e:
+                raise Exception(f"Error summarising the description in parts: {str(e)}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return "\n\n".join(f"Part {part}: {note}" for part, note in enumerate(notes, 1))
+
+    def get_summary(self, text, timeout=None, refresh=False, telemetry=None):
+        if not self.model:
+            return text
+
+        try:
+            prompt = SUMMARY_PROMPT + text
+            return self._generate(prompt, text, timeout, refresh, telemetry=telemetry,
+                                  kind='summary').strip()
         except Exception as e:
             raise Exception(f"Error in text summarization: {str(e)}")
 
-    def get_takeaways(self, text, takeaway_prompt=None):
+    def get_takeaways(self, text, takeaway_prompt=None, timeout=None, refresh=False, telemetry=None):
+        """Returns the takeaways as a list of {'title', 'description'} dicts."""
         if not self.model:
             return []
-    
+
         try:
-            if not takeaway_prompt:
-                takeaway_prompt = """Based on the event description given, identify exactly four key takeaways related to the event. Keep it a line or two each. Focus on the specific difficulties, dilemmas, and impacts discussed, rather than just general event outcomes. Format each takeaway with a title and description separated by a colon, without any asterisks (use numbers). Do not include the phrase 'Key Takeaways'. Example format:
-                Takeaway Title: Takeaway"""
-            
-            prompt = takeaway_prompt + f"\nEvent Description: {text}"
-            response = self.model.generate_content(prompt)
-    
-            takeaways = []
-            for line in response.text.split('\n'):
-                line = line.strip()
-                #if line and not line.startswith(('•', '-', '*', '1.', '2.', '3.', '4.', '5.')):
-                if line and not line.startswith(('•', '-', '*')):
-                    line = line.replace('*', '')
-                    takeaways.append(line.strip())
-    
-            return takeaways
+            prompt = (takeaway_prompt or TAKEAWAY_PROMPT) + f"\nEvent Description: {text}"
+            response_text = self._generate(prompt, text, timeout, refresh, telemetry=telemetry,
+                                           kind='takeaways')
+            return parse_takeaways(response_text)
         except Exception as e:
             raise Exception(f"Error generating takeaways: {str(e)}")
+
+    def stream_summary(self, text, on_text, timeout=None, refresh=False, telemetry=None):
+        """Like get_summary, but calls on_text(text so far) as the reply streams in."""
+        if not self.model:
+            on_text(text)
+            return text
+
+        prompt = SUMMARY_PROMPT + text
+        return self._stream(prompt, text, on_text, timeout, refresh, telemetry, 'summary',
+                            "Error in text summarization").strip()
+
+    def stream_takeaways(self, text, on_text, takeaway_prompt=None, timeout=None, refresh=False,
+                         telemetry=None):
+        """Like get_takeaways, but calls on_text(text so far) as the reply streams in."""
+        if not self.model:
+            return []
+
+        prompt = (takeaway_prompt or TAKEAWAY_PROMPT) + f"\nEvent Description: {text}"
+        return parse_takeaways(self._stream(prompt, text, on_text, timeout, refresh, telemetry,
+                                            'takeaways', "Error generating takeaways"))
+
+    def get_report_content(self, text, timeout=None, refresh=False, telemetry=None):
+        """Asks for the summary and takeaways in one JSON reply validated against a schema."""
+        if not self.model:
+            return text, []
+
+        try:
+            return self._generate(REPORT_CONTENT_PROMPT + text, text, timeout, refresh,
+                                  REPORT_CONTENT_SCHEMA, parse_report_content, telemetry, 'report_content')
+        except Exception as e:
+            raise Exception(f"Error generating report content: {str(e)}")
+
+    def get_summary_and_takeaways(self, text, takeaway_prompt=None, timeout=None, refresh=False,
+                                  telemetry=None):
+        """Returns (summary, takeaways), from one structured request or two concurrent ones.
+        Long descriptions are condensed chunk by chunk first."""
+        text = self.condense(text, timeout, refresh, telemetry)
+        if self.structured_output and not takeaway_prompt:
+            return self.get_report_content(text, timeout, refresh, telemetry)
+
+        timeout = timeout or self.timeout
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            summary_future = executor.submit(self.get_summary, text, timeout, refresh, telemetry)
+            takeaways_future = executor.submit(self.get_takeaways, text, takeaway_prompt, timeout, refresh,
+                                               telemetry)
+            try:
+                summary = summary_future.result(timeout=timeout)
+                takeaways = takeaways_future.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise Exception(f"The model did not respond within {timeout} seconds")
+            return summary, takeaways
+        finally:
+            # Don't block on a request that has already timed out
+            executor.shutdown(wait=False, cancel_futures=True)
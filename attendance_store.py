@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+import time
+
+class AttendanceStore:
+    """SQLite archive of every report's cleaned attendance, indexed on application_id.
+
+    One row per event (keyed on title, date and time, so regenerating a report replaces its
+    attendance instead of counting it twice, while morning and afternoon sessions of the same
+    event stay separate) and one row per participant per event.
+    Dates are compared as text, so ISO dates (YYYY-MM-DD) filter correctly.
+    """
+
+    def __init__(self, path="attendance.sqlite3"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL DEFAULT '',
+                venue TEXT,
+                club TEXT,
+                hours REAL,
+                participants INTEGER NOT NULL,
+                recorded REAL NOT NULL,
+                UNIQUE (title, date, time));
+            CREATE TABLE IF NOT EXISTS attendance (
+                event_id INTEGER NOT NULL REFERENCES events (id),
+                application_id TEXT NOT NULL,
+                name TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_attendance_application_id ON attendance (application_id);
+            CREATE INDEX IF NOT EXISTS idx_attendance_event_id ON attendance (event_id);
+            CREATE INDEX IF NOT EXISTS idx_events_date ON events (date);
+        """)
+        self.conn.commit()
+
+    def record_event(self, event, attendance_data):
+        """Stores the event's details and its cleaned name/application_id frame; returns the event id."""
+        rows = list(zip(attendance_data['application_id'].astype(str), attendance_data['name'].astype(str)))
+        key = (event['title'], event['date'], event.get('time') or '')
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM attendance WHERE event_id IN "
+                                  "(SELECT id FROM events WHERE title = ? AND date = ? AND time = ?)", key)
+                self.conn.execute("DELETE FROM events WHERE title = ? AND date = ? AND time = ?", key)
+                cursor = self.conn.execute(
+                    "INSERT INTO events (title, date, time, venue, club, hours, participants, recorded) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    key + (event.get('venue'), event.get('club'), event.get('hours'), len(rows), time.time()))
+                event_id = cursor.lastrowid
+                self.conn.executemany("INSERT INTO attendance (event_id, application_id, name) VALUES (?, ?, ?)",
+                                      ((event_id, application_id, name) for application_id, name in rows))
+        return event_id
+
+    @staticmethod
+    def _date_filter(start, end, column='e.date'):
+        clauses, params = [], []
+        if start:
+            clauses.append(f"{column} >= ?")
+            params.append(start)
+        if end:
+            clauses.append(f"{column} <= ?")
+            params.append(end)
+        return (" AND " + " AND ".join(clauses) if clauses else ""), params
+
+    def _query(self, sql, params):
+        import pandas as pd
+
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    def totals(self, start=None, end=None):
+        where, params = self._date_filter(start, end)
+        with self.lock:
+            events, hours = self.conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(e.hours), 0) FROM events e WHERE 1 = 1{where}",
+                params).fetchone()
+            attendances, volunteers, volunteer_hours = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT NULLIF(a.application_id, '')), "
+                "COALESCE(SUM(e.hours), 0) "
+                f"FROM attendance a JOIN events e ON e.id = a.event_id WHERE 1 = 1{where}",
+                params).fetchone()
+        return {'events': events, 'event_hours': hours, 'attendances': attendances,
+                'volunteers': volunteers, 'volunteer_hours': volunteer_hours}
+
+    def event_summary(self, start=None, end=None):
+        where, params = self._date_filter(start, end)
+        return self._query(
+            "SELECT e.date, e.time, e.title, e.club, e.participants, e.hours FROM events e "
+            f"WHERE 1 = 1{where} ORDER BY e.date, e.title, e.time", params)
+
+    def volunteer_summary(self, start=None, end=None):
+        """Events attended and hours per application ID, most active volunteers first."""
+        where, params = self._date_filter(start, end)
+        return self._query(
+            "SELECT a.application_id, MAX(a.name) AS name, COUNT(DISTINCT a.event_id) AS events, "
+            "COALESCE(SUM(e.hours), 0) AS hours "
+            "FROM attendance a JOIN events e ON e.id = a.event_id "
+            f"WHERE a.application_id != ''{where} "
+            "GROUP BY a.application_id ORDER BY hours DESC, events DESC, a.application_id", params)
+
+    def events_for(self, application_id, start=None, end=None):
+        """The events one volunteer attended, found through the application_id index."""
+        where, params = self._date_filter(start, end)
+        return self._query(
+            "SELECT e.date, e.time, e.title, e.club, e.hours FROM attendance a "
+            "JOIN events e ON e.id = a.event_id "
+            f"WHERE a.application_id = ?{where} ORDER BY e.date, e.time",
+            [application_id.strip().upper()] + params)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,289 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from api_handler import APIHandler, CHUNK_TOKENS, LONG_INPUT_TOKENS, MAP_CONCURRENCY
+from attendance_store import AttendanceStore
+from llm_backends import make_backend, BACKENDS
+from llm_cache import LLMCache
+from image_cache import ImageCache
+from report_builder import ReportBuilder, report_filename
+from request_scheduler import RequestScheduler
+from telemetry import Telemetry, METRICS_LOG
+from utils import (get_stored_api_key, prepare_image_file, load_clean_attendance, format_size,
+                   parse_hours, IMAGE_FORMAT, JPEG_QUALITY)
+
+LIST_SEPARATOR = ';'
+# Requests per minute on the free tier of gemini-2.0-flash-lite
+GEMINI_RATE_LIMIT = 30
+
+def split_list(value, name='list', number=1):
+    """Manifest lists are JSON arrays or ';'-separated strings in CSV."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    if not isinstance(value, str):
+        raise ValueError(f"Manifest entry {number}: '{name}' must be a list or a ';'-separated string")
+    return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+
+def text_field(row, name, number=1):
+    """A text field of a manifest row, '' when missing; JSON numbers and objects are rejected."""
+    value = row.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValueError(f"Manifest entry {number}: '{name}' must be a string")
+    return value
+
+def read_manifest(path):
+    """Reads one event per CSV row / JSON object; file paths are resolved against the manifest."""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get('events', [])
+    else:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    entries = [parse_entry(row, base_dir, number) for number, row in enumerate(rows, start=1)]
+
+    # Reports are built at the same time, so entries sharing a title and date need their own file
+    used = set()
+    for number, entry in enumerate(entries, start=1):
+        filename = report_filename(entry['title'], entry['date'])
+        if filename.lower() in used:
+            filename = report_filename(entry['title'], entry['date'], number)
+        used.add(filename.lower())
+        entry['filename'] = filename
+    return entries
+
+def parse_entry(row, base_dir, number=1):
+    """Turns one manifest row or service request into an entry; file paths are resolved
+    against base_dir."""
+    def resolve(file_path):
+        return os.path.join(base_dir, file_path) if file_path else None
+
+    if not isinstance(row, dict):
+        raise ValueError(f"Manifest entry {number} must be an object with the event fields")
+    row = {str(key).strip().lower(): value for key, value in row.items() if key}
+    title = text_field(row, 'title', number).strip()
+    if not title:
+        raise ValueError(f"Manifest entry {number} has no title")
+    hours = row.get('hours')
+    if hours is not None and not isinstance(hours, (str, int, float)):
+        raise ValueError(f"Manifest entry {number}: 'hours' must be a number")
+    images = [resolve(p) for p in split_list(row.get('images'), 'images', number)]
+    captions = split_list(row.get('captions'), 'captions', number)
+    return {
+        'title': title,
+        'date': text_field(row, 'date', number).strip(),
+        'time': text_field(row, 'time', number).strip(),
+        'hours': parse_hours(hours),
+        'venue': text_field(row, 'venue', number).strip(),
+        'club': text_field(row, 'club', number).strip(),
+        'description': text_field(row, 'description', number),
+        'images': images,
+        'captions': captions + [''] * (len(images) - len(captions)),
+        'flyer': resolve(text_field(row, 'flyer', number).strip()),
+        'attendance': resolve(text_field(row, 'attendance', number).strip()),
+    }
+
+class BoundedAPIHandler:
+    """Limits how many reports can be waiting on the model at the same time."""
+
+    def __init__(self, api_handler, limit):
+        self.api_handler = api_handler
+        self.semaphore = threading.BoundedSemaphore(limit)
+
+    @property
+    def model(self):
+        return self.api_handler.model
+
+    def get_summary_and_takeaways(self, *args, **kwargs):
+        with self.semaphore:
+            return self.api_handler.get_summary_and_takeaways(*args, **kwargs)
+
+def prepare_event(entry, process_pool, refresh=False, image_encoding=None, image_cache=None):
+    """Runs image conversion and attendance loading in the process pool."""
+    image_encoding = image_encoding or {}
+    convert = image_cache.word_image if image_cache else prepare_image_file
+    image_futures = [process_pool.submit(convert, path, **image_encoding)
+                     for path in entry['images']]
+    flyer_future = (process_pool.submit(convert, entry['flyer'], **image_encoding)
+                    if entry['flyer'] else None)
+    attendance_future = (process_pool.submit(load_clean_attendance, entry['attendance'])
+                         if entry['attendance'] else None)
+
+    event = {key: entry[key] for key in ('title', 'date', 'time', 'hours', 'venue', 'club', 'description')}
+    event['images'] = [{'path': path, 'caption': caption, 'image': io.BytesIO(future.result())}
+                       for path, caption, future in zip(entry['images'], entry['captions'], image_futures)]
+    event['flyer'] = io.BytesIO(flyer_future.result()) if flyer_future else None
+    event['attendance_data'], event['attendance_cleaning'] = (
+        attendance_future.result() if attendance_future else (None, None))
+    event['refresh_ai'] = refresh
+    return event
+
+def build_report(entry, api_handler, process_pool, output_dir, refresh=False, image_encoding=None,
+                 image_cache=None, metrics_log=METRICS_LOG, attendance_store=None, progress=None):
+    telemetry = Telemetry(entry['title'], metrics_log)
+    with telemetry.span('prepare'):
+        event = prepare_event(entry, process_pool, refresh, image_encoding, image_cache)
+
+    builder = ReportBuilder(api_handler, event, output_dir, image_encoding, telemetry=telemetry,
+                            attendance_store=attendance_store, filename=entry.get('filename'))
+    builder.run(progress)
+    return builder
+
+def print_summary(builders, failures, elapsed):
+    total = len(builders) + len(failures)
+    print()
+    print(f"Built {len(builders)} of {total} reports in {elapsed:.1f}s "
+          f"({len(builders) / elapsed * 60 if elapsed else 0:.1f} reports/min)")
+
+    if builders:
+        print(f"Total document size {format_size(sum(builder.document_size for builder in builders))}")
+        stage_totals = {}
+        for builder in builders:
+            for name, seconds in builder.stage_times.items():
+                stage_totals[name] = stage_totals.get(name, 0.0) + seconds
+        print("Average time per stage:")
+        for name, seconds in stage_totals.items():
+            print(f"  {name:<14} {seconds / len(builders):8.2f}s")
+
+        api_calls = [call for builder in builders for call in builder.telemetry.api_calls]
+        if api_calls:
+            tokens = sum(call.get('total_tokens', 0) for call in api_calls)
+            print(f"API calls {len(api_calls)} ({sum(1 for call in api_calls if call['cached'])} cached), "
+                  f"{sum(call['retries'] for call in api_calls)} retries, {tokens} tokens "
+                  f"({tokens / len(builders):.0f} per report)")
+
+    for title, error in failures:
+        print(f"FAILED {title}: {error}")
+
+def add_pipeline_arguments(parser):
+    """Options shared by batch mode and the report service."""
+    parser.add_argument('-o', '--output-dir', default='reports', help="Folder for the .docx files")
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count(),
+                        help="Worker processes for image and attendance work")
+    parser.add_argument('--api-key', help="Gemini API key (defaults to GEMINI_API_KEY or api_key.txt)")
+    parser.add_argument('--backend', choices=list(BACKENDS), default='gemini',
+                        help="gemini, an OpenAI-compatible server (openai) or canned offline replies (stub)")
+    parser.add_argument('--model', help="Model name for the backend")
+    parser.add_argument('--base-url', help="Server URL for the openai backend (default http://localhost:8080/v1)")
+    parser.add_argument('--rate-limit', type=float,
+                        help="Requests per minute shared by all reports (default 30 for gemini, "
+                             "no limit for the others; 0 for no limit)")
+    parser.add_argument('--max-retries', type=int, default=4,
+                        help="Retries for rate-limit and transient errors, with exponential backoff")
+    parser.add_argument('--chunk-tokens', type=int, default=CHUNK_TOKENS,
+                        help="Chunk size for descriptions too long to summarise in one request")
+    parser.add_argument('--long-input-tokens', type=int, default=LONG_INPUT_TOKENS,
+                        help="Descriptions longer than this are summarised chunk by chunk first")
+    parser.add_argument('--map-concurrency', type=int, default=MAP_CONCURRENCY,
+                        help="Chunks of one description summarised at the same time")
+    parser.add_argument('--image-format', choices=['auto', 'jpeg', 'png'], default=IMAGE_FORMAT,
+                        help="Encoding for embedded pictures (auto: JPEG for photos, PNG for graphics)")
+    parser.add_argument('--jpeg-quality', type=int, default=JPEG_QUALITY, help="JPEG quality (1-95)")
+    parser.add_argument('--max-image-kb', type=int, help="Optional size budget per embedded picture")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Do not read or write the AI response and image caches")
+    parser.add_argument('--metrics-log', default=METRICS_LOG,
+                        help="JSON-lines file for per-report timings and API usage ('' to disable)")
+    parser.add_argument('--attendance-db', default='attendance.sqlite3',
+                        help="Archive each event's attendance here for semester_report.py ('' to disable)")
+
+def create_pipeline(args, parser):
+    """Returns (api_handler, image_encoding, image_cache, attendance_store) for the parsed options."""
+    backend_options = {'model_name': args.model}
+    if args.backend == 'openai':
+        backend_options['base_url'] = args.base_url
+    backend = make_backend(args.backend, **backend_options)
+
+    api_key = args.api_key or os.environ.get('GEMINI_API_KEY') or get_stored_api_key()
+    if backend.needs_api_key and not api_key:
+        parser.error("No API key given; pass --api-key, set GEMINI_API_KEY or save one from the GUI")
+
+    rate_limit = args.rate_limit
+    if rate_limit is None:
+        rate_limit = GEMINI_RATE_LIMIT if args.backend == 'gemini' else 0
+    scheduler = RequestScheduler(rate_limit or None, max_retries=args.max_retries)
+    api_handler = APIHandler(cache=None if args.no_cache else LLMCache(), backend=backend,
+                             scheduler=scheduler, chunk_tokens=args.chunk_tokens,
+                             long_input_tokens=args.long_input_tokens,
+                             map_concurrency=args.map_concurrency)
+    api_handler.initialize_model(api_key if backend.needs_api_key else args.api_key)
+    os.makedirs(args.output_dir, exist_ok=True)
+    image_encoding = {'image_format': args.image_format, 'quality': args.jpeg_quality,
+                      'max_bytes': args.max_image_kb * 1024 if args.max_image_kb else None}
+    image_cache = None if args.no_cache else ImageCache()
+    attendance_store = AttendanceStore(args.attendance_db) if args.attendance_db else None
+    return api_handler, image_encoding, image_cache, attendance_store
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build NSS event reports from a CSV/JSON manifest.")
+    parser.add_argument('manifest', help="CSV or JSON file with one event per row")
+    parser.add_argument('-j', '--jobs', type=int, default=4, help="Reports built at the same time")
+    parser.add_argument('--api-concurrency', type=int, default=2,
+                        help="Reports allowed to wait on the model at the same time")
+    parser.add_argument('--refresh', action='store_true', help="Ignore cached AI responses")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="Print the stage and API breakdown of every report")
+    add_pipeline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        entries = read_manifest(args.manifest)
+    except Exception as e:
+        parser.error(f"Error reading manifest: {str(e)}")
+
+    api_handler, image_encoding, image_cache, attendance_store = create_pipeline(args, parser)
+    bounded_api_handler = BoundedAPIHandler(api_handler, args.api_concurrency)
+
+    estimates = [api_handler.estimate_request(entry['description']) for entry in entries]
+    long_inputs = sum(1 for estimate in estimates if estimate['chunks'])
+    print(f"Estimated AI input: about {sum(e['prompt_tokens'] for e in estimates):,} tokens in "
+          f"{sum(e['requests'] for e in estimates)} requests before caching"
+          + (f" ({long_inputs} long descriptions summarised in parts)" if long_inputs else ""))
+
+    builders, failures = [], []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as process_pool, \
+            ThreadPoolExecutor(max_workers=args.jobs) as report_pool:
+        futures = {report_pool.submit(build_report, entry, bounded_api_handler, process_pool,
+                                      args.output_dir, args.refresh, image_encoding, image_cache,
+                                      args.metrics_log, attendance_store): entry
+                   for entry in entries}
+        for future in as_completed(futures):
+            title = futures[future]['title']
+            try:
+                builder = future.result()
+            except Exception as e:
+                failures.append((title, str(e)))
+                print(f"[{len(builders) + len(failures)}/{len(entries)}] FAILED {title}: {str(e)}")
+            else:
+                builders.append(builder)
+                print(f"[{len(builders) + len(failures)}/{len(entries)}] {builder.filename} "
+                      f"({format_size(builder.document_size)})")
+                if builder.archive_warning:
+                    print(f"  {builder.archive_warning}")
+                if args.verbose:
+                    print(builder.telemetry.summary())
+
+    if image_cache:
+        image_cache.evict()
+    if attendance_store:
+        attendance_store.close()
+    print_summary(builders, failures, time.perf_counter() - start)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
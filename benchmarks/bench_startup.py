@@ -0,0 +1,69 @@
+"""Measures how long importing the app takes, broken down by top-level package.
+
+Run from the repository root:  python -m benchmarks.bench_startup [--budget 1.5]
+Uses `python -X importtime` in a fresh interpreter so nothing is already cached.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(module):
+    """Returns (total seconds, [(package, cumulative seconds)], every module name it pulled in)
+    for `module` and its direct imports."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ''
+        raise RuntimeError(f"import {module} failed: {last_line}")
+
+    # -X importtime prints children before their parent, indented two spaces per level
+    children = []
+    names = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        seconds = int(cumulative) / 1e6
+        if depth == 0:
+            if name.strip() == module:
+                return seconds, children, names
+            children = []
+            names = set()
+            continue
+        names.add(name.strip())
+        if depth == 1:
+            children.append((name.strip(), seconds))
+    raise RuntimeError(f"No import timing found for {module}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='main', help="Module to import (default: main)")
+    parser.add_argument('--top', type=int, default=15, help="How many packages to list")
+    parser.add_argument('--budget', type=float, help="Fail if the import takes longer (seconds)")
+    args = parser.parse_args()
+
+    try:
+        total, times, names = import_times(args.module)
+    except RuntimeError as e:
+        print(str(e))
+        return 2
+
+    print(f"import {args.module}: {total:.3f}s")
+    for name, seconds in sorted(times, key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<40} {seconds:7.3f}s")
+
+    for heavy in ('pandas', 'PIL', 'docx', 'google.generativeai'):
+        if heavy in names:
+            print(f"warning: {heavy} is imported at startup")
+
+    if args.budget is not None and total > args.budget:
+        print(f"Startup import time {total:.3f}s is over the {args.budget:.3f}s budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Compares the bulk participants table writer with the old per-cell python-docx path.
+
+Run from the repository root:  python -m benchmarks.bench_table --rows 10000
+"""
+import argparse
+import io
+import time
+
+import pandas as pd
+from docx import Document
+from docx.shared import Pt, RGBColor
+
+from utils import add_table_to_document, format_attendance_table
+
+def add_table_per_cell(doc, df):
+    # The previous implementation, kept here as the baseline
+    table = doc.add_table(rows=1, cols=len(df.columns))
+    table.style = 'Table Grid'
+
+    header_cells = table.rows[0].cells
+    headers = ['Sr. No.', 'Name', 'Application ID']
+    for i, header in enumerate(headers):
+        header_cells[i].text = header
+        if header_cells[i].paragraphs and header_cells[i].paragraphs[0].runs:
+            run = header_cells[i].paragraphs[0].runs[0]
+            run.font.bold = True
+            run.font.name = 'Times New Roman'
+            run.font.size = Pt(12)
+            run.font.color.rgb = RGBColor(0, 0, 0)
+
+    for _, row in df.iterrows():
+        row_cells = table.add_row().cells
+        for i, value in enumerate(row):
+            row_cells[i].text = str(value)
+            if row_cells[i].paragraphs and row_cells[i].paragraphs[0].runs:
+                run = row_cells[i].paragraphs[0].runs[0]
+                run.font.name = 'Times New Roman'
+                run.font.size = Pt(12)
+                run.font.color.rgb = RGBColor(0, 0, 0)
+
+def make_attendance(rows):
+    return pd.DataFrame({
+        'Name': [f"Volunteer {i}" for i in range(rows)],
+        'Application_ID': [f"NSS{i:06d}" for i in range(rows)],
+    })
+
+def time_table(add_table, df):
+    doc = Document()
+    start = time.perf_counter()
+    add_table(doc, df)
+    build_time = time.perf_counter() - start
+
+    out = io.BytesIO()
+    start = time.perf_counter()
+    doc.save(out)
+    return build_time, time.perf_counter() - start, out.tell()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--skip-baseline', action='store_true', help="Only time the bulk writer")
+    args = parser.parse_args()
+
+    df = format_attendance_table(make_attendance(args.rows))
+    candidates = [('bulk xml', add_table_to_document)]
+    if not args.skip_baseline:
+        candidates.append(('per cell', add_table_per_cell))
+
+    print(f"{args.rows} rows")
+    for name, add_table in candidates:
+        build_time, save_time, size = time_table(add_table, df)
+        print(f"  {name:<10} build {build_time:8.2f}s  save {save_time:6.2f}s  docx {size / 1024:8.0f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""An offline stand-in for APIHandler with deterministic output and simulated latency."""
+import hashlib
+import threading
+import time
+
+class FakeAPIHandler:
+    """Answers like APIHandler without the network. `latency` is seconds per request."""
+
+    def __init__(self, latency=0.5):
+        self.latency = latency
+        self.model = True
+        self.model_name = 'fake'
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _request(self, text, telemetry=None, kind='generate'):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if telemetry:
+            tokens = len(text.split())
+            telemetry.record_api_call(kind, self.latency, usage={
+                'prompt_tokens': tokens, 'output_tokens': 300, 'total_tokens': tokens + 300})
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:8]
+
+    @staticmethod
+    def _summary(digest):
+        paragraph = ("The NSS Unit Of Atlas SkillTech University organised an event "
+                     f"({digest}) where volunteers took part and discussed its impact. ") * 5
+        return f"{paragraph.strip()}\n\n{paragraph.strip()}"
+
+    @staticmethod
+    def _takeaways(digest):
+        return [{'title': f"Takeaway {i} {digest}",
+                 'description': "A line or two describing a difficulty discussed at the event."}
+                for i in range(1, 5)]
+
+    def get_summary(self, text, timeout=None, refresh=False, telemetry=None):
+        return self._summary(self._request(text, telemetry, 'summary'))
+
+    def get_takeaways(self, text, takeaway_prompt=None, timeout=None, refresh=False, telemetry=None):
+        return self._takeaways(self._request(text, telemetry, 'takeaways'))
+
+    def get_report_content(self, text, timeout=None, refresh=False, telemetry=None):
+        # One structured request, like APIHandler's default mode
+        digest = self._request(text, telemetry, 'report_content')
+        return self._summary(digest), self._takeaways(digest)
+
+    def get_summary_and_takeaways(self, text, takeaway_prompt=None, timeout=None, refresh=False,
+                                  telemetry=None):
+        return self.get_report_content(text, timeout, refresh, telemetry)
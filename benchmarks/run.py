@@ -0,0 +1,244 @@
+"""Benchmarks the report pipeline's hot paths on synthetic inputs, fully offline.
+
+Run from the repository root:
+    python -m benchmarks.run                 # full suite
+    python -m benchmarks.run --quick         # smaller inputs
+    python -m benchmarks.run --json out.json # also save results to compare releases
+
+Each case reports wall time (best of --repeat runs) and peak traced memory.
+Peak memory comes from tracemalloc, so it covers Python and NumPy/pandas
+allocations but not Pillow's internal image buffers.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fake_api import FakeAPIHandler
+from benchmarks.synthetic import (make_photos, make_attendance_frame, make_attendance_file,
+                                  make_description)
+
+def measure(func, repeat=1):
+    """Returns (best seconds, peak traced bytes) for func()."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def bench_images(workdir, sizes, count, repeat):
+    from PIL import Image
+    from utils import convert_image_for_word, process_image_file
+
+    for size_name in sizes:
+        paths = make_photos(workdir, size_name, count)
+
+        def convert():
+            for path in paths:
+                with Image.open(path) as img:
+                    convert_image_for_word(img)
+
+        def ingest():
+            for path in paths:
+                process_image_file(path)
+
+        yield f"convert_image_for_word {size_name} x{count}", measure(convert, repeat)
+        yield f"process_image_file {size_name} x{count}", measure(ingest, repeat)
+
+def bench_photo_index(photo_counts, repeat):
+    """Adds each photo's hashes to a PhotoIndex after checking it for a near-duplicate, as
+    add_images does. Random hashes are the worst case for the BK-tree's pruning."""
+    import random
+    from photo_hash import PhotoIndex
+
+    for count in photo_counts:
+        rng = random.Random(count)
+        hashes = [(rng.getrandbits(64), rng.getrandbits(64)) for _ in range(count)]
+
+        def index():
+            photo_index = PhotoIndex()
+            for i, photo_hashes in enumerate(hashes):
+                if photo_index.find(photo_hashes) is None:
+                    photo_index.add(photo_hashes, i)
+
+        yield f"PhotoIndex find+add x{count}", measure(index, repeat)
+
+# Writing a larger synthetic .xlsx takes longer than the rest of the suite
+XLSX_MAX_ROWS = 5000
+
+def bench_attendance(workdir, row_counts, repeat):
+    from docx import Document
+    from utils import (format_attendance_table, add_table_to_document, load_attendance_file,
+                       clean_attendance)
+
+    for rows in row_counts:
+        csv_path = make_attendance_file(os.path.join(workdir, f"attendance_{rows}.csv"), rows,
+                                        duplicates=0.05)
+        df = load_attendance_file(csv_path)
+        formatted = format_attendance_table(df)
+
+        yield f"load_attendance_file csv {rows} rows", measure(lambda: load_attendance_file(csv_path), repeat)
+        if rows <= XLSX_MAX_ROWS:
+            xlsx_path = make_attendance_file(os.path.join(workdir, f"attendance_{rows}.xlsx"), rows)
+            yield (f"load_attendance_file xlsx {rows} rows",
+                   measure(lambda: load_attendance_file(xlsx_path), repeat))
+        yield f"clean_attendance {rows} rows", measure(lambda: clean_attendance(df), repeat)
+        yield f"format_attendance_table {rows} rows", measure(lambda: format_attendance_table(df), repeat)
+        yield (f"add_table_to_document {rows} rows",
+               measure(lambda: add_table_to_document(Document(), formatted), repeat))
+
+def bench_preview(workdir, row_counts, description, repeat):
+    """Drives NSSReportGenerator.update_preview on an offscreen Qt platform, if PyQt5 is installed.
+
+    The window's caches and attendance store are created in workdir, not the repository.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        print("  (skipping update_preview: PyQt5 is not installed)")
+        return
+
+    from main import NSSReportGenerator, PREVIEW_SECTIONS
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = NSSReportGenerator(workdir)
+    window.description_text.setPlainText(description)
+    for rows in row_counts:
+        window.attendance_data = make_attendance_frame(rows)
+
+        def full_render():
+            window.participant_pages.clear()
+            window.dirty_preview_sections.update(PREVIEW_SECTIONS)
+            window.update_preview()
+
+        def keystroke():
+            window.dirty_preview_sections.add('description')
+            window.update_preview()
+
+        yield f"update_preview full {rows} rows", measure(full_render, repeat)
+        yield f"update_preview keystroke {rows} rows", measure(keystroke, repeat)
+    window.close()
+    # Closed before the temporary folder is removed
+    window.api_handler.cache.close()
+    window.attendance_store.close()
+
+def bench_report(workdir, photo_count, rows, description, latency):
+    """Runs every ReportBuilder stage with the fake API and reports each stage on its own."""
+    from report_builder import ReportBuilder
+    from telemetry import Telemetry
+
+    photos = make_photos(workdir, '2mp', photo_count, seed=100)
+    event = {
+        'title': 'Benchmark Event', 'date': '2025-01-01', 'time': '10:00', 'venue': 'Auditorium',
+        'club': 'NSS', 'description': description,
+        'images': [{'path': path, 'caption': f"Caption {i}"} for i, path in enumerate(photos)],
+        'flyer': photos[0] if photos else None,
+        'attendance_data': make_attendance_frame(rows),
+    }
+
+    output_dir = os.path.join(workdir, 'reports')
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Timed run first, then a traced run for memory, since tracemalloc slows every stage down
+    builder = ReportBuilder(FakeAPIHandler(latency), event, output_dir,
+                            telemetry=Telemetry(log_path=None))
+    builder.run()
+    stage_times = builder.stage_times
+
+    traced = ReportBuilder(FakeAPIHandler(latency), event, output_dir,
+                           telemetry=Telemetry(log_path=None))
+    stage_names = [name for name, _, _ in traced.stages()]
+    stage_peaks = {}
+
+    def progress(done, total, label):
+        # The peak is reset before each stage so it is attributed to that stage alone
+        if done:
+            stage_peaks[stage_names[done - 1]] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+
+    tracemalloc.start()
+    try:
+        traced.run(progress)
+    finally:
+        tracemalloc.stop()
+
+    for name, seconds in stage_times.items():
+        yield f"generate_report stage {name}", (seconds, stage_peaks.get(name, 0))
+    yield "generate_report total", (sum(stage_times.values()), max(stage_peaks.values(), default=0))
+
+    # Regenerating after a caption edit only renders that picture again
+    from section_cache import SectionCache
+
+    section_cache = SectionCache()
+    ReportBuilder(FakeAPIHandler(latency), event, output_dir, telemetry=Telemetry(log_path=None),
+                  section_cache=section_cache).run()
+    edits = iter(range(1, 1000))
+
+    def rebuild():
+        if event['images']:
+            event['images'][-1]['caption'] = f"Edited caption {next(edits)}"
+        ReportBuilder(FakeAPIHandler(latency), event, output_dir, telemetry=Telemetry(log_path=None),
+                      section_cache=section_cache).run()
+
+    yield "generate_report rebuild after caption edit", measure(rebuild)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="Smaller inputs for a fast check")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the best is reported")
+    parser.add_argument('--latency', type=float, default=0.5, help="Fake Gemini latency per request")
+    parser.add_argument('--only', choices=['images', 'attendance', 'preview', 'report'], action='append',
+                        help="Run only these groups (repeatable)")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    if args.quick:
+        sizes, photo_count, row_counts, words = ['vga', '2mp'], 3, [100, 5000], 500
+        index_counts = [100]
+    else:
+        sizes, photo_count, row_counts, words = ['vga', '2mp', '12mp'], 5, [100, 1000, 10000, 50000], 3000
+        index_counts = [100, 500, 2000]
+    groups = args.only or ['images', 'attendance', 'preview', 'report']
+    description = make_description(words)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = []
+        if 'images' in groups:
+            cases.append(bench_images(workdir, sizes, photo_count, args.repeat))
+            cases.append(bench_photo_index(index_counts, args.repeat))
+        if 'attendance' in groups:
+            cases.append(bench_attendance(workdir, row_counts, args.repeat))
+        if 'preview' in groups:
+            cases.append(bench_preview(workdir, row_counts, description, args.repeat))
+        if 'report' in groups:
+            cases.append(bench_report(workdir, photo_count, row_counts[-1], description, args.latency))
+
+        print(f"{'case':<48} {'time':>10} {'peak mem':>12}")
+        for group in cases:
+            for name, (seconds, peak) in group:
+                print(f"{name:<48} {seconds:9.3f}s {peak / 1024 / 1024:10.1f} MB")
+                results.append({'case': name, 'seconds': seconds, 'peak_bytes': peak})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                       'results': results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Deterministic synthetic inputs for the benchmarks: photos, attendance sheets, descriptions."""
+import os
+import random
+
+PHOTO_SIZES = {
+    'vga': (640, 480),
+    '2mp': (1600, 1200),
+    '12mp': (4000, 3000),
+}
+
+WORDS = ("volunteers village cleanliness drive awareness students community health camp "
+         "session speaker discussed plantation blood donation survey literacy water sanitation "
+         "faculty coordinator outreach workshop rural women children elderly nutrition").split()
+
+def make_photo(path, width, height, seed=0, quality=90):
+    """Writes a photo-like JPEG: a colour gradient with a few shapes and noise, so it compresses
+    like a real one and photos with different seeds do not look alike."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    base = Image.linear_gradient('L').resize((width, height))
+    channels = [base.rotate(rng.choice([0, 90, 180, 270]), expand=False).resize((width, height))
+                for _ in range(3)]
+    img = Image.merge('RGB', channels)
+    draw = ImageDraw.Draw(img)
+    for _ in range(6):
+        x, y = rng.randrange(width), rng.randrange(height)
+        w, h = rng.randint(width // 8, width // 2), rng.randint(height // 8, height // 2)
+        draw.ellipse((x - w // 2, y - h // 2, x + w // 2, y + h // 2),
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.effect_noise((width, height), 40).convert('RGB')
+    img = Image.blend(img, noise, 0.35)
+    img.save(path, format='JPEG', quality=quality)
+    return path
+
+def make_burst_shot(path, source, seed=0):
+    """Writes a near-duplicate of `source`, as from a burst or another phone: slightly cropped,
+    rescaled, brightened and recompressed."""
+    from PIL import Image, ImageEnhance
+
+    rng = random.Random(seed)
+    with Image.open(source) as img:
+        width, height = img.size
+        dx, dy = rng.randint(0, width // 40), rng.randint(0, height // 40)
+        shot = img.crop((dx, dy, width - width // 40 + dx, height - height // 40 + dy)).resize((width, height))
+    ImageEnhance.Brightness(shot).enhance(rng.uniform(0.9, 1.1)).save(path, format='JPEG',
+                                                                      quality=rng.randint(60, 90))
+    return path
+
+def make_photos(directory, size_name, count, seed=0):
+    width, height = PHOTO_SIZES[size_name]
+    return [make_photo(os.path.join(directory, f"{size_name}_{i}.jpg"), width, height, seed + i)
+            for i in range(count)]
+
+def make_attendance_frame(rows, extra_columns=0, seed=0, duplicates=0.0):
+    """`duplicates` is the fraction of rows that repeat an earlier participant with messy
+    spacing and case, like a merge of several registration exports."""
+    import pandas as pd
+
+    rng = random.Random(seed)
+    data = {f"Field {i}": [rng.randint(0, 10000) for _ in range(rows)] for i in range(extra_columns)}
+    data['Name'] = [f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}" for i in range(rows)]
+    data['Application_ID'] = [f"NSS{i:07d}" for i in range(rows)]
+    for i in range(1, rows):
+        if rng.random() < duplicates:
+            j = rng.randrange(i)
+            data['Name'][i] = f"  {data['Name'][j].upper()} "
+            data['Application_ID'][i] = data['Application_ID'][j].lower()
+    return pd.DataFrame(data)
+
+def make_attendance_file(path, rows, extra_columns=40, seed=0, duplicates=0.0):
+    df = make_attendance_frame(rows, extra_columns, seed, duplicates)
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+    return path
+
+def make_description(words, seed=0):
+    rng = random.Random(seed)
+    sentences = []
+    while sum(len(sentence.split()) for sentence in sentences) < words:
+        sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+        sentences.append(sentence.capitalize() + '.')
+    return ' '.join(sentences)
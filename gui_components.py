@@ -1,12 +1,45 @@
 from PyQt5.QtWidgets import (QLabel, QLineEdit, QPushButton, QTextEdit,
                            QVBoxLayout, QHBoxLayout, QFrame, QWidget,
-                           QScrollArea, QMessageBox, QFileDialog)  # Import missing modules
+                           QScrollArea, QMessageBox, QFileDialog, QProgressBar, QCheckBox)  # Import missing modules
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPalette, QColor, QFont, QPixmap, QIcon  # Import missing modules
+from PyQt5.QtGui import QPalette, QColor, QFont, QPixmap, QIcon, QImage, QTextDocument  # Import missing modules
+from collections import OrderedDict
 from datetime import datetime
 import os
 import sys
 
+class PreviewTextEdit(QTextEdit):
+    """Read-only preview that serves `thumb:` image URLs from a bounded in-memory cache.
+
+    Thumbnails are decoded once when registered, so re-rendering the HTML after a text
+    edit only looks them up again instead of re-encoding or re-sending image bytes.
+    """
+
+    def __init__(self, max_images=300, parent=None):
+        super().__init__(parent)
+        self.max_images = max_images
+        self.images = OrderedDict()
+
+    def add_image(self, name, data):
+        image = QImage.fromData(data)
+        if image.isNull():
+            return
+        self.images[name] = image
+        self.images.move_to_end(name)
+        while len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+
+    def remove_image(self, name):
+        self.images.pop(name, None)
+
+    def loadResource(self, resource_type, url):
+        if resource_type == QTextDocument.ImageResource and url.scheme() == 'thumb':
+            image = self.images.get(url.toString())
+            if image is not None:
+                self.images.move_to_end(url.toString())
+                return image
+        return super().loadResource(resource_type, url)
+
 def apply_styles(widget):
     widget.setStyleSheet("")  # Clear any inline styles
     widget.setProperty("class", widget.__class__.__name__)  # Add a class based on the widget type
@@ -75,6 +108,9 @@ def create_event_details_section():
     
     time_label = create_styled_label("Event Time:")
     time_entry = create_styled_input(datetime.now().strftime('%H:%M'))
+
+    hours_label = create_styled_label("Duration (hours):")
+    hours_entry = create_styled_input("e.g. 2.5, for volunteer hour totals")
     
     description_label = create_styled_label("Event Description:")
     description_text = create_styled_text_edit("Enter event description")
@@ -87,11 +123,11 @@ def create_event_details_section():
 
     # Add all widgets to layout
     for widget in [title_label, title_entry, date_label, date_entry,
-                  time_label, time_entry, description_label, description_text,
+                  time_label, time_entry, hours_label, hours_entry, description_label, description_text,
                   venue_label, venue_entry, club_label, club_entry]:
         layout.addWidget(widget)
 
-    return (frame, title_entry, date_entry, time_entry, description_text,
+    return (frame, title_entry, date_entry, time_entry, hours_entry, description_text,
             venue_entry, club_entry)  # Return the frame
 
 def create_image_sections():
@@ -128,15 +164,80 @@ def create_attendance_section():
 
     return frame, upload_attendance_button  # Return the frame
 
+def create_ai_draft_section():
+    frame = create_section_frame()
+    layout = QVBoxLayout(frame)
+
+    ai_label = create_styled_label("AI Summary and Takeaways", True)
+    hint_label = create_styled_label("Draft the text with AI and edit it before generating the report. "
+                                     "If left empty, it is generated with the report.")
+    hint_label.setWordWrap(True)
+
+    draft_button = create_styled_button("Draft with AI")
+    # Size of the request to the model, updated as the description is typed
+    estimate_label = create_styled_label("")
+    estimate_label.setWordWrap(True)
+
+    summary_label = create_styled_label("Summary:")
+    summary_text = create_styled_text_edit("The AI summary appears here as it is written")
+
+    takeaways_label = create_styled_label("Takeaways (one per line, as Title: description):")
+    takeaways_text = create_styled_text_edit("The AI takeaways appear here as they are written")
+
+    for widget in [ai_label, hint_label, draft_button, estimate_label, summary_label, summary_text,
+                   takeaways_label, takeaways_text]:
+        layout.addWidget(widget)
+
+    return frame, draft_button, estimate_label, summary_text, takeaways_text
+
+def create_generate_section():
+    frame = create_section_frame()
+    layout = QVBoxLayout(frame)
+
+    generate_report_button = create_styled_button("Generate Report")
+
+    refresh_ai_checkbox = QCheckBox("Refresh AI text (ignore cached responses)")
+
+    progress_frame = QFrame()
+    progress_layout = QHBoxLayout(progress_frame)
+
+    progress_bar = QProgressBar()
+    progress_bar.setFormat("%p% - Idle")
+    progress_bar.setValue(0)
+    progress_layout.addWidget(progress_bar)
+
+    cancel_button = create_styled_button("Cancel")
+    cancel_button.setEnabled(False)
+    progress_layout.addWidget(cancel_button)
+
+    layout.addWidget(refresh_ai_checkbox)
+    layout.addWidget(generate_report_button)
+    layout.addWidget(progress_frame)
+
+    return frame, generate_report_button, refresh_ai_checkbox, progress_bar, cancel_button
+
 def create_preview_section():
     frame = create_section_frame()
     layout = QVBoxLayout(frame)
     
     preview_label = create_styled_label("Live Preview", True)
-    preview_edit = create_styled_text_edit()
+    preview_edit = PreviewTextEdit()
     preview_edit.setReadOnly(True)
-    
+
+    # Pages through long participants lists in the preview
+    pager_frame = QFrame()
+    pager_layout = QHBoxLayout(pager_frame)
+    previous_button = create_styled_button("Previous participants")
+    previous_button.setEnabled(False)
+    page_label = create_styled_label("")
+    page_label.setAlignment(Qt.AlignCenter)
+    next_button = create_styled_button("Next participants")
+    next_button.setEnabled(False)
+    for widget in [previous_button, page_label, next_button]:
+        pager_layout.addWidget(widget)
+
     layout.addWidget(preview_label)
     layout.addWidget(preview_edit)
+    layout.addWidget(pager_frame)
 
-    return frame, preview_edit  # Return the frame
+    return frame, preview_edit, previous_button, page_label, next_button
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+
+from utils import (process_image_file, prepare_image_file, MAX_IMAGE_WIDTH, IMAGE_FORMAT,
+                   JPEG_QUALITY)
+
+class ImageCache:
+    """On-disk cache of thumbnails and Word-ready images with a size cap and LRU eviction.
+
+    Entries are keyed on the source file's path, size and mtime plus the conversion
+    settings, so an edited photo or a different encoding never returns a stale image.
+    Writes are atomic renames, so worker processes can share one cache directory.
+    """
+
+    def __init__(self, directory="image_cache", max_bytes=500 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(path, kind, **params):
+        stat = os.stat(path)
+        identity = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns, kind, params]
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def encoding_params(max_width=MAX_IMAGE_WIDTH, image_format=IMAGE_FORMAT, quality=JPEG_QUALITY,
+                        max_bytes=None):
+        return {'max_width': max_width, 'image_format': image_format, 'quality': quality,
+                'max_bytes': max_bytes}
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # The file's mtime doubles as its last-used time for eviction
+        os.utime(entry_path)
+        return data
+
+    def put(self, key, data):
+        entry_path = self._entry_path(key)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, entry_path)
+
+    def evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def thumbnail(self, path, thumbnail_size=(150, 150), **encoding):
+        """Returns thumbnail bytes. On a miss the photo is decoded once and both the thumbnail
+        and the Word-ready image are stored."""
+        params = self.encoding_params(**encoding)
+        thumbnail_key = self.make_key(path, 'thumbnail', size=list(thumbnail_size),
+                                      max_width=params['max_width'])
+        thumbnail_bytes = self.get(thumbnail_key)
+        if thumbnail_bytes is not None:
+            return thumbnail_bytes
+
+        thumbnail_bytes, word_bytes = process_image_file(path, thumbnail_size, **params)
+        self.put(thumbnail_key, thumbnail_bytes)
+        self.put(self.make_key(path, 'word', **params), word_bytes)
+        return thumbnail_bytes
+
+    def word_image(self, path, **encoding):
+        """Returns Word-ready image bytes, converting and storing them on a miss."""
+        params = self.encoding_params(**encoding)
+        key = self.make_key(path, 'word', **params)
+        word_bytes = self.get(key)
+        if word_bytes is None:
+            word_bytes = prepare_image_file(path, **params)
+            self.put(key, word_bytes)
+        return word_bytes
@@ -0,0 +1,199 @@
+import json
+import time
+import urllib.error
+import urllib.request
+
+from telemetry import usage_from_response
+
+class GeminiBackend:
+    """Google Gemini through google.generativeai."""
+
+    name = 'gemini'
+    needs_api_key = True
+
+    def __init__(self, model_name='gemini-2.0-flash-lite'):
+        self.model_name = model_name
+        self.model = None
+
+    @property
+    def ready(self):
+        return self.model is not None
+
+    def configure(self, api_key=None):
+        # google.generativeai takes seconds to import, so it is only loaded when first needed
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(self.model_name)
+
+    def generate(self, prompt, timeout, schema=None):
+        """Returns (text, usage). With a schema the reply is JSON matching it."""
+        generation_config = None
+        if schema is not None:
+            import google.generativeai as genai
+
+            generation_config = genai.GenerationConfig(response_mime_type='application/json',
+                                                       response_schema=schema)
+        response = self.model.generate_content(prompt, generation_config=generation_config,
+                                               request_options={'timeout': timeout})
+        return response.text, usage_from_response(response)
+
+    def stream(self, prompt, timeout):
+        """Yields the reply's text as it arrives and returns the usage at the end."""
+        response = self.model.generate_content(prompt, stream=True, request_options={'timeout': timeout})
+        for chunk in response:
+            if chunk.parts:
+                yield chunk.text
+        return usage_from_response(response)
+
+    @staticmethod
+    def is_retryable(error):
+        """Rate limits and transient server errors are worth another attempt."""
+        from google.api_core import exceptions
+
+        return isinstance(error, (exceptions.ResourceExhausted, exceptions.ServiceUnavailable,
+                                  exceptions.InternalServerError))
+
+class OpenAICompatibleBackend:
+    """Any server speaking the OpenAI chat completions API, such as a local llama.cpp,
+    Ollama or vLLM instance, so reports can be written without Gemini or the internet."""
+
+    name = 'openai'
+    needs_api_key = False
+
+    def __init__(self, model_name='local-model', base_url='http://localhost:8080/v1', api_key=None):
+        self.model_name = model_name
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.ready = True
+
+    def configure(self, api_key=None):
+        if api_key:
+            self.api_key = api_key
+
+    def _open(self, body, timeout):
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(f"{self.base_url}/chat/completions",
+                                         data=json.dumps(body).encode('utf-8'), headers=headers)
+        try:
+            return urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get('Retry-After') if e.headers else None
+            if retry_after and retry_after.isdigit():
+                e.retry_after = float(retry_after)
+            raise
+
+    @staticmethod
+    def _usage(data):
+        usage = data.get('usage') or {}
+        return {
+            'prompt_tokens': usage.get('prompt_tokens', 0),
+            'output_tokens': usage.get('completion_tokens', 0),
+            'total_tokens': usage.get('total_tokens', 0),
+        }
+
+    def generate(self, prompt, timeout, schema=None):
+        body = {'model': self.model_name, 'messages': [{'role': 'user', 'content': prompt}]}
+        if schema is not None:
+            body['response_format'] = {'type': 'json_schema',
+                                       'json_schema': {'name': 'report_content', 'schema': schema}}
+        with self._open(body, timeout) as response:
+            data = json.load(response)
+        return data['choices'][0]['message']['content'], self._usage(data)
+
+    def stream(self, prompt, timeout):
+        """Yields the reply's text from the server-sent events and returns the usage at the end."""
+        body = {'model': self.model_name, 'messages': [{'role': 'user', 'content': prompt}],
+                'stream': True, 'stream_options': {'include_usage': True}}
+        usage = {}
+        with self._open(body, timeout) as response:
+            for line in response:
+                line = line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                payload = line[len('data:'):].strip()
+                if payload == '[DONE]':
+                    break
+                data = json.loads(payload)
+                if data.get('usage'):
+                    usage = self._usage(data)
+                for choice in data.get('choices') or []:
+                    content = (choice.get('delta') or {}).get('content')
+                    if content:
+                        yield content
+        return usage
+
+    @staticmethod
+    def is_retryable(error):
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code == 429 or error.code >= 500
+        # The local server may still be starting up
+        return isinstance(error, urllib.error.URLError)
+
+class StubBackend:
+    """Canned replies with no network, for trying the app out and for offline runs.
+
+    The reply reuses the opening of the event details so reports still differ per event.
+    """
+
+    name = 'stub'
+    needs_api_key = False
+
+    def __init__(self, model_name='stub', latency=0.0):
+        self.model_name = model_name
+        self.latency = latency
+        self.ready = True
+
+    def configure(self, api_key=None):
+        pass
+
+    def generate(self, prompt, timeout, schema=None):
+        time.sleep(min(self.latency, timeout))
+        return self._reply(prompt, schema)
+
+    def stream(self, prompt, timeout):
+        """Yields the canned reply a few words at a time, spread over `latency` seconds."""
+        text, usage = self._reply(prompt)
+        words = text.split(' ')
+        pieces = [" ".join(words[i:i + 5]) + " " for i in range(0, len(words), 5)]
+        for piece in pieces:
+            time.sleep(min(self.latency, timeout) / len(pieces))
+            yield piece
+        return usage
+
+    def _reply(self, prompt, schema=None):
+        details = prompt.rsplit('here are the details:', 1)[-1].strip()
+        opening = " ".join(details.split()[:40]) or "an event"
+        summary = (f"The NSS Unit Of Atlas SkillTech University organised {opening}.\n\n"
+                   "Volunteers took part in the activities and discussed what they learned "
+                   "and the impact of the event on the community.")
+        takeaways = [{'title': f"Takeaway {i}", 'description': "A point raised during the event."}
+                     for i in range(1, 5)]
+
+        if schema is not None:
+            text = json.dumps({'summary': summary, 'takeaways': takeaways})
+        elif 'Event Description:' in prompt:
+            text = "\n".join(f"{t['title']}: {t['description']}" for t in takeaways)
+        else:
+            text = summary
+        words = len(prompt.split())
+        return text, {'prompt_tokens': words, 'output_tokens': len(text.split()),
+                      'total_tokens': words + len(text.split())}
+
+    @staticmethod
+    def is_retryable(error):
+        return False
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'openai': OpenAICompatibleBackend,
+    'stub': StubBackend,
+}
+
+def make_backend(name='gemini', **options):
+    """Creates a backend by name; options without a value fall back to the backend's defaults."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}'; choose one of {', '.join(BACKENDS)}")
+    return BACKENDS[name](**{key: value for key, value in options.items() if value is not None})
@@ -0,0 +1,82 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+class LLMCache:
+    """Content-addressed SQLite cache of model responses with LRU eviction by size and age."""
+
+    def __init__(self, path="llm_cache.sqlite3", max_entries=1000, max_bytes=50 * 1024 * 1024,
+                 max_age=30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                 key TEXT PRIMARY KEY,
+                                 value TEXT NOT NULL,
+                                 size INTEGER NOT NULL,
+                                 created REAL NOT NULL,
+                                 last_used REAL NOT NULL)""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model_name, prompt, text):
+        digest = hashlib.sha256()
+        for part in (model_name, prompt, text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT value, created FROM responses WHERE key = ?",
+                                    (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.max_age and now - created > self.max_age:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return value
+
+    def put(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO responses (key, value, size, created, last_used) "
+                              "VALUES (?, ?, ?, ?, ?)",
+                              (key, value, len(value.encode('utf-8')), now, now))
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now):
+        if self.max_age:
+            self.conn.execute("DELETE FROM responses WHERE created < ?", (now - self.max_age,))
+
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until both limits hold
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -1,33 +1,48 @@
 import os
-import io
-import pandas as pd
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from PIL import Image
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                            QFileDialog, QMessageBox, QScrollArea, QFrame,
-                           QSplitter, QLabel, QLineEdit, QPushButton)
+                           QSplitter, QLabel, QLineEdit, QCheckBox)
 from PyQt5.QtGui import QIcon, QPixmap
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 import sys
-
-from utils import (get_stored_api_key, save_api_key_to_file, convert_image_for_word,
-                  format_attendance_table, add_table_to_document, add_formatted_heading,
-                  add_formatted_paragraph)
-from api_handler import APIHandler
+from html import escape as html_escape
+
+from utils import (get_stored_api_key, save_api_key_to_file, load_clean_attendance, format_size,
+                  describe_attendance_cleaning, parse_hours,
+                  make_thumbnail)
+from api_handler import APIHandler, parse_edited_takeaways
+from llm_cache import LLMCache
+from attendance_store import AttendanceStore
+from image_cache import ImageCache
+from report_builder import ReportBuilder
+from section_cache import SectionCache
+from photo_hash import PhotoIndex
+from workers import ReportWorker, ImageIngestWorker, StartupWorker, AIDraftWorker
 from gui_components import (create_api_section, create_event_details_section,
                           create_image_sections, create_attendance_section,
-                          create_preview_section, apply_styles)  # Import apply_styles
+                          create_ai_draft_section, create_generate_section, create_preview_section,
+                          apply_styles)  # Import apply_styles
+
+# Preview sections in display order; each is re-rendered only when its inputs change
+PREVIEW_SECTIONS = ['details', 'description', 'ai_content', 'pictures', 'flyer', 'participants']
+PREVIEW_DEBOUNCE_MS = 250
+PREVIEW_MAX_PARTICIPANTS = 100
 
 class NSSReportGenerator(QWidget):
-    def __init__(self):
+    def __init__(self, data_dir=''):
         super().__init__()
-        self.api_handler = APIHandler()
+        # The response cache, image cache and attendance archive live in data_dir
+        self.api_handler = APIHandler(cache=LLMCache(os.path.join(data_dir, "llm_cache.sqlite3")))
+        self.image_cache = ImageCache(os.path.join(data_dir, "image_cache"))
+        self.attendance_store = AttendanceStore(os.path.join(data_dir, "attendance.sqlite3"))
+        # The last generated document, so regenerating only redoes the sections that changed
+        self.section_cache = SectionCache()
         self.setup_window()
         self.initialize_variables()
         self.create_gui()
-        self.load_api_key_on_startup()
+
+        # Gemini and the document libraries load in the background once the window is up
+        QTimer.singleShot(0, self.load_api_key_on_startup)
 
         # Load CSS styles
         self.load_styles()
@@ -39,9 +54,24 @@ class NSSReportGenerator(QWidget):
 
     def initialize_variables(self):
         self.images = []
+        # Perceptual hashes of the photos kept so far, to catch burst shots and re-uploads
+        self.photo_index = PhotoIndex()
+        self.next_image_id = 0
+        self.flyer_preview_name = None
         self.attendance_file = None
         self.attendance_data = None
+        self.attendance_cleaning = None
+        # The participants preview shows one page at a time; each page's table is rendered once
+        self.participants_page = 0
+        self.participant_pages = {}
         self.event_flyer = None
+        self.report_worker = None
+        self.image_worker = None
+        self.startup_worker = None
+        self.ai_draft_worker = None
+        self.image_batch = []
+        self.preview_sections = {}
+        self.dirty_preview_sections = set(PREVIEW_SECTIONS)
 
     def create_gui(self):
         # Main layout with splitter
@@ -70,7 +100,7 @@ class NSSReportGenerator(QWidget):
 
         # Event Details Section
         (self.event_details_frame, self.title_entry, self.date_entry,
-         self.time_entry, self.description_text, self.venue_entry,
+         self.time_entry, self.hours_entry, self.description_text, self.venue_entry,
          self.club_entry) = create_event_details_section()
         self.scrollable_layout.addWidget(self.event_details_frame)
 
@@ -86,10 +116,18 @@ class NSSReportGenerator(QWidget):
         upload_attendance_button.clicked.connect(self.upload_attendance)
         self.scrollable_layout.addWidget(self.attendance_frame)
 
-        # Generate Report Button
-        generate_report_button = QPushButton("Generate Report")
-        generate_report_button.clicked.connect(self.generate_report)
-        self.scrollable_layout.addWidget(generate_report_button)
+        # AI Draft Section
+        (self.ai_draft_frame, self.draft_ai_button, self.token_estimate_label, self.summary_text,
+         self.takeaways_text) = create_ai_draft_section()
+        self.draft_ai_button.clicked.connect(self.draft_ai_content)
+        self.scrollable_layout.addWidget(self.ai_draft_frame)
+
+        # Generate Report Section
+        (self.generate_frame, self.generate_report_button, self.refresh_ai_checkbox,
+         self.report_progress_bar, self.cancel_report_button) = create_generate_section()
+        self.generate_report_button.clicked.connect(self.generate_report)
+        self.cancel_report_button.clicked.connect(self.cancel_report)
+        self.scrollable_layout.addWidget(self.generate_frame)
 
         # Add left widget to splitter
         splitter.addWidget(left_widget)
@@ -97,7 +135,10 @@ class NSSReportGenerator(QWidget):
         # Right side (preview)
         right_widget = QWidget()
         right_layout = QVBoxLayout(right_widget)
-        self.preview_frame, self.preview_edit = create_preview_section()
+        (self.preview_frame, self.preview_edit, self.previous_participants_button,
+         self.participants_page_label, self.next_participants_button) = create_preview_section()
+        self.previous_participants_button.clicked.connect(lambda: self.show_participants_page(-1))
+        self.next_participants_button.clicked.connect(lambda: self.show_participants_page(1))
         right_layout.addWidget(self.preview_frame)
         splitter.addWidget(right_widget)
 
@@ -123,21 +164,32 @@ class NSSReportGenerator(QWidget):
             QMessageBox.critical(self, "Error", f"Error loading styles: {str(e)}")
 
     def connect_signals(self):
-        self.title_entry.textChanged.connect(self.update_preview)
-        self.date_entry.textChanged.connect(self.update_preview)
-        self.time_entry.textChanged.connect(self.update_preview)
-        self.venue_entry.textChanged.connect(self.update_preview)
-        self.club_entry.textChanged.connect(self.update_preview)
-        self.description_text.textChanged.connect(self.update_preview)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
+
+        for entry in (self.title_entry, self.date_entry, self.time_entry,
+                      self.venue_entry, self.club_entry):
+            entry.textChanged.connect(lambda: self.schedule_preview('details'))
+        self.description_text.textChanged.connect(lambda: self.schedule_preview('description'))
+        for text_edit in (self.summary_text, self.takeaways_text):
+            text_edit.textChanged.connect(lambda: self.schedule_preview('ai_content'))
 
     def load_api_key_on_startup(self):
         api_key = get_stored_api_key()
         if api_key:
-            try:
-                self.api_key_entry.setText(api_key)
-                self.api_handler.initialize_model(api_key)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error loading API key: {str(e)}")
+            self.api_key_entry.setText(api_key)
+
+        self.startup_worker = StartupWorker(self.api_handler, api_key, self)
+        self.startup_worker.model_failed.connect(
+            lambda message: QMessageBox.critical(self, "Error", f"Error loading API key: {message}"))
+        self.startup_worker.finished.connect(self.on_startup_finished)
+        self.startup_worker.start()
+
+    def on_startup_finished(self):
+        self.startup_worker.deleteLater()
+        self.startup_worker = None
 
     def save_api_key(self):
         api_key = self.api_key_entry.text().strip()
@@ -158,9 +210,19 @@ class NSSReportGenerator(QWidget):
         )
         if file:
             try:
-                self.event_flyer = Image.open(file)
+                # Only the path is kept; the flyer is converted when the report is generated
+                from PIL import Image
+
+                with Image.open(file) as flyer:
+                    flyer.verify()
+                self.event_flyer = file
+                # A fresh name per flyer so the preview never shows a previously loaded one
+                self.preview_edit.remove_image(self.flyer_preview_name)
+                self.flyer_preview_name = f"thumb:flyer/{self.next_image_id}"
+                self.next_image_id += 1
+                self.preview_edit.add_image(self.flyer_preview_name, make_thumbnail(file, (300, 300)))
                 QMessageBox.information(self, "Success", "Event flyer added successfully!")
-                self.update_preview()
+                self.schedule_preview('flyer')
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error adding flyer: {str(e)}")
 
@@ -170,38 +232,105 @@ class NSSReportGenerator(QWidget):
             "Image files (*.png *.jpg *.jpeg *.gif *.bmp)"
         )
 
+        if not files:
+            return
+
+        # Each photo gets a placeholder now; its thumbnail fills in when the pool finishes it
+        batch = []
         for file in files:
             img_frame = QFrame()
             img_layout = QVBoxLayout(img_frame)
             self.image_preview_layout.addWidget(img_frame)
 
-            img = Image.open(file)
-            img_high_res = convert_image_for_word(img)
-            
-            img_copy = img.copy()  # Create a copy before thumbnailing
-            img_copy.thumbnail((150, 150))
-            img_byte_arr = io.BytesIO()
-            img_copy.save(img_byte_arr, format='PNG')
-            pixmap = QPixmap()
-            pixmap.loadFromData(img_byte_arr.getvalue())
-            
-            label = QLabel()
-            label.setPixmap(pixmap)
+            label = QLabel("Loading...")
             label.setAlignment(Qt.AlignCenter)
             img_layout.addWidget(label)
 
             caption_entry = QLineEdit()
             caption_entry.setText("Enter caption")
-            caption_entry.textChanged.connect(self.update_preview)
+            caption_entry.textChanged.connect(lambda: self.schedule_preview('pictures'))
             img_layout.addWidget(caption_entry)
 
-            self.images.append({
+            include_checkbox = QCheckBox("Include in report")
+            include_checkbox.setChecked(True)
+            include_checkbox.toggled.connect(lambda: self.schedule_preview('pictures'))
+            img_layout.addWidget(include_checkbox)
+
+            img_data = {
                 'path': file,
                 'caption_widget': caption_entry,
-                'image': img_high_res
-            })
-            
-        self.update_preview()
+                'include_widget': include_checkbox,
+                'hashes': None,
+                'duplicate_of': None,
+                'thumbnail': None,
+                'preview_name': f"thumb:image/{self.next_image_id}",
+                'frame': img_frame,
+                'label': label
+            }
+            self.images.append(img_data)
+            batch.append(img_data)
+            self.next_image_id += 1
+
+        self.image_batch = batch
+        self.add_images_button.setEnabled(False)
+        self.image_worker = ImageIngestWorker(files, self, self.image_cache)
+        self.image_worker.image_ready.connect(self.on_image_ready)
+        self.image_worker.image_failed.connect(self.on_image_failed)
+        self.image_worker.finished.connect(self.on_images_finished)
+        self.image_worker.start()
+
+        self.schedule_preview('pictures')
+
+    def on_image_ready(self, index, thumbnail_bytes, hashes):
+        img_data = self.image_batch[index]
+        img_data['thumbnail'] = thumbnail_bytes
+        img_data['hashes'] = hashes
+
+        pixmap = QPixmap()
+        pixmap.loadFromData(thumbnail_bytes)
+        img_data['label'].setPixmap(pixmap)
+
+        # Registered once; later preview renders only reference it by name
+        self.preview_edit.add_image(img_data['preview_name'], thumbnail_bytes)
+        self.schedule_preview('pictures')
+
+    def on_image_failed(self, index, message):
+        img_data = self.image_batch[index]
+        self.images.remove(img_data)
+        self.preview_edit.remove_image(img_data['preview_name'])
+        img_data['frame'].deleteLater()
+        QMessageBox.critical(self, "Error", f"Error adding image {os.path.basename(img_data['path'])}: {message}")
+        self.schedule_preview('pictures')
+
+    def flag_duplicates(self, batch):
+        """Checks the photos in the order they were selected, so the first of a burst is kept
+        whichever one finished processing first. Returns how many were set aside."""
+        duplicates = 0
+        for img_data in batch:
+            if img_data.get('hashes') is None:
+                continue
+            # A near-duplicate stays visible but is left out of the report unless ticked again
+            original = self.photo_index.find(img_data['hashes'])
+            if original is not None:
+                img_data['duplicate_of'] = original
+                img_data['include_widget'].setChecked(False)
+                img_data['include_widget'].setText(
+                    f"Include in report (similar to {os.path.basename(original['path'])})")
+                duplicates += 1
+            else:
+                self.photo_index.add(img_data['hashes'], img_data)
+        return duplicates
+
+    def on_images_finished(self):
+        duplicates = self.flag_duplicates(self.image_batch)
+        self.image_worker.deleteLater()
+        self.image_worker = None
+        self.image_batch = []
+        self.add_images_button.setEnabled(True)
+        if duplicates:
+            QMessageBox.information(self, "Similar photos",
+                                    f"{duplicates} photo(s) look like near-duplicates of others and "
+                                    "were left out of the report. Tick \"Include in report\" to keep them.")
 
     def upload_attendance(self):
         file, _ = QFileDialog.getOpenFileName(
@@ -211,167 +340,292 @@ class NSSReportGenerator(QWidget):
         self.attendance_file = file
         if self.attendance_file:
             try:
-                if self.attendance_file.endswith('.csv'):
-                    self.attendance_data = pd.read_csv(self.attendance_file)
-                else:
-                    self.attendance_data = pd.read_excel(self.attendance_file)
-
-                required_columns = ['name', 'application_id']
-                missing_columns = [col for col in required_columns if col.lower() not in
-                                 [c.lower() for c in self.attendance_data.columns]]
-
-                if missing_columns:
-                    missing_columns_lower = [col.lower() for col in missing_columns]
-                    raise ValueError(f"Missing required columns: {', '.join(missing_columns_lower)}")
-
-                QMessageBox.information(self, "Success", "Participants list uploaded successfully!")
-                self.update_preview()
+                self.attendance_data, self.attendance_cleaning = load_clean_attendance(self.attendance_file)
+                message = "Participants list uploaded successfully!"
+                cleaning = describe_attendance_cleaning(self.attendance_cleaning)
+                if cleaning:
+                    message += f"\n\n{cleaning}"
+                QMessageBox.information(self, "Success", message)
             except Exception as e:
                 self.attendance_data = None
+                self.attendance_cleaning = None
                 QMessageBox.critical(self, "Error", f"Error reading file: {str(e)}")
-
-    def update_preview(self):
-        preview_html = f"""
-        <div style="font-family: 'Times New Roman'; font-size: 12pt;">
+            self.participants_page = 0
+            self.participant_pages.clear()
+            self.schedule_preview('details', 'participants')
+
+    def schedule_preview(self, *sections):
+        """Marks preview sections as stale and re-renders once typing pauses."""
+        self.dirty_preview_sections.update(sections or PREVIEW_SECTIONS)
+        self.preview_timer.start()
+
+    def render_preview_section(self, section):
+        if section == 'details':
+            return f"""
             <h1 style="text-align: center; font-size: 14pt;">Event Report</h1>
-            
+
             <p><b>Title:</b> {self.title_entry.text()}</p>
             <p><b>Date:</b> {self.date_entry.text()}</p>
             <p><b>Time:</b> {self.time_entry.text()}</p>
             <p><b>Venue:</b> {self.venue_entry.text()}</p>
-            
+
             <p><b>Number of Participants:</b> {len(self.attendance_data) if self.attendance_data is not None else 0}</p>
             <p><b>Name of Student Led Club:</b> {self.club_entry.text()}</p>
-            
+            """
+
+        if section == 'description':
+            return f"""
             <h2 style="font-size: 14pt;">Pre AI Summary</h2>
             <p>{self.description_text.toPlainText()}</p>
-        """
-
-        if self.images:
-            preview_html += "<h2 style='font-size: 14pt; text-align: center;'>Pictures</h2>"
-            for img_data in self.images:
+            """
+
+        if section == 'ai_content':
+            summary = self.summary_text.toPlainText().strip()
+            takeaways = parse_edited_takeaways(self.takeaways_text.toPlainText())
+            if not summary and not takeaways:
+                return ""
+            summary_html = html_escape(summary).replace("\n", "<br>")
+            html = f"<h2 style='font-size: 14pt;'>Summary</h2><p>{summary_html}</p>"
+            if takeaways:
+                html += "<h2 style='font-size: 14pt;'>Key Problem-Focused Takeaways</h2>"
+                for takeaway in takeaways:
+                    title = f"<b>{html_escape(takeaway['title'])}:</b> " if takeaway['title'] else ""
+                    html += f"<p>{title}{html_escape(takeaway['description'])}</p>"
+            return html
+
+        if section == 'pictures':
+            images = self.included_images()
+            if not images:
+                return ""
+            html = "<h2 style='font-size: 14pt; text-align: center;'>Pictures</h2>"
+            for img_data in images:
                 caption = img_data['caption_widget'].text()
-                preview_html += f"<p style='text-align: center;'>[Image Placeholder]</p>"
-                preview_html += f"<p style='text-align: center;'>{caption}</p>"
+                if img_data['thumbnail'] is not None:
+                    html += f"<p style='text-align: center;'><img src='{img_data['preview_name']}'></p>"
+                else:
+                    html += f"<p style='text-align: center;'>[Loading Image]</p>"
+                html += f"<p style='text-align: center;'>{caption}</p>"
+            return html
+
+        if section == 'flyer':
+            if not self.event_flyer:
+                return ""
+            return ("<h2 style='font-size: 14pt; text-align: center;'>Event Flyer</h2>"
+                    f"<p style='text-align: center;'><img src='{self.flyer_preview_name}'></p>")
+
+        if section == 'participants':
+            if self.attendance_data is None:
+                self.update_participants_pager(0, 0)
+                return ""
+            # Only the current page is rendered; the report still gets the full list
+            rows = len(self.attendance_data)
+            pages = max(1, -(-rows // PREVIEW_MAX_PARTICIPANTS))
+            self.participants_page = page = min(self.participants_page, pages - 1)
+            table = self.participant_pages.get(page)
+            if table is None:
+                start = page * PREVIEW_MAX_PARTICIPANTS
+                rows_html = self.attendance_data.iloc[start:start + PREVIEW_MAX_PARTICIPANTS]
+                table = self.participant_pages[page] = rows_html.to_html(index=False)
+            self.update_participants_pager(page, pages)
+
+            html = "<h2 style='font-size: 14pt;'>Participants List (Will only take reqd. columns)</h2>"
+            cleaning = describe_attendance_cleaning(self.attendance_cleaning)
+            if cleaning:
+                html += f"<p><i>{cleaning}</i></p>"
+            html += table
+            if pages > 1:
+                html += (f"<p><i>{self.participants_page_label.text()} "
+                         f"(all will be included in the report)</i></p>")
+            return html
+
+        return ""
+
+    def update_participants_pager(self, page, pages):
+        rows = len(self.attendance_data) if self.attendance_data is not None else 0
+        start = page * PREVIEW_MAX_PARTICIPANTS
+        self.participants_page_label.setText(
+            f"Participants {start + 1}-{min(start + PREVIEW_MAX_PARTICIPANTS, rows)} of {rows}"
+            if pages > 1 else "")
+        self.previous_participants_button.setEnabled(page > 0)
+        self.next_participants_button.setEnabled(page < pages - 1)
+
+    def show_participants_page(self, step):
+        self.participants_page = max(0, self.participants_page + step)
+        self.dirty_preview_sections.add('participants')
+        self.update_preview()
 
-        if self.event_flyer:
-            preview_html += "<h2 style='font-size: 14pt; text-align: center;'>Event Flyer</h2>"
-            preview_html += "<p style='text-align: center;'>[Event Flyer Placeholder]</p>"
+    def update_token_estimate(self):
+        estimate = self.api_handler.estimate_request(self.description_text.toPlainText().strip())
+        if not estimate['tokens']:
+            self.token_estimate_label.setText("")
+            return
+        text = f"About {estimate['tokens']:,} tokens of description"
+        if estimate['chunks']:
+            text += (f", summarised in {estimate['chunks']} parts first: {estimate['requests']} requests, "
+                     f"about {estimate['prompt_tokens']:,} tokens in total")
+        self.token_estimate_label.setText(text)
+
+    def update_preview(self):
+        if 'description' in self.dirty_preview_sections:
+            self.update_token_estimate()
 
-        if self.attendance_data is not None:
-            preview_html += "<h2 style='font-size: 14pt;'>Participants List (Will only take reqd. columns)</h2>"
-            preview_html += self.attendance_data.to_html(index=False)
+        # Only stale sections are rebuilt; the rest come from the cache
+        for section in self.dirty_preview_sections:
+            self.preview_sections[section] = self.render_preview_section(section)
+        self.dirty_preview_sections.clear()
 
+        preview_html = """<div style="font-family: 'Times New Roman'; font-size: 12pt;">"""
+        preview_html += "".join(self.preview_sections.get(section, "") for section in PREVIEW_SECTIONS)
         preview_html += "</div>"
+
+        scroll_bar = self.preview_edit.verticalScrollBar()
+        scroll_position = scroll_bar.value()
         self.preview_edit.setHtml(preview_html)
+        scroll_bar.setValue(scroll_position)
+
+    def included_images(self):
+        return [img_data for img_data in self.images if img_data['include_widget'].isChecked()]
+
+    def collect_event(self):
+        """Takes a snapshot of the form so the report can be built off the GUI thread."""
+        return {
+            'title': self.title_entry.text(),
+            'date': self.date_entry.text(),
+            'time': self.time_entry.text(),
+            'hours': parse_hours(self.hours_entry.text()),
+            'venue': self.venue_entry.text(),
+            'club': self.club_entry.text(),
+            'description': self.description_text.toPlainText(),
+            'images': [{'path': img_data['path'], 'caption': img_data['caption_widget'].text()}
+                       for img_data in self.included_images()],
+            'flyer': self.event_flyer,
+            'attendance_data': self.attendance_data,
+            'attendance_cleaning': self.attendance_cleaning,
+            'refresh_ai': self.refresh_ai_checkbox.isChecked(),
+            # Reviewed AI text, if drafted; the report only asks the model when this is empty
+            'summary': self.summary_text.toPlainText().strip(),
+            'takeaways': parse_edited_takeaways(self.takeaways_text.toPlainText()),
+        }
+
+    def draft_ai_content(self):
+        if self.startup_worker is not None:
+            QMessageBox.information(self, "Please wait", "The AI model is still loading")
+            return
+        if not self.api_handler.model:
+            QMessageBox.critical(self, "Error", "Please save your API Key first")
+            return
+        if self.ai_draft_worker is not None or self.report_worker is not None:
+            return
+        description = self.description_text.toPlainText().strip()
+        if not description:
+            QMessageBox.information(self, "No description", "Enter the event description first")
+            return
+
+        self.summary_text.clear()
+        self.takeaways_text.clear()
+        self.ai_draft_worker = AIDraftWorker(self.api_handler, self.title_entry.text(), description,
+                                             self.refresh_ai_checkbox.isChecked(), self)
+        self.ai_draft_worker.text_updated.connect(self.on_ai_draft_text)
+        self.ai_draft_worker.failed.connect(
+            lambda message: QMessageBox.critical(self, "Error", f"Error drafting AI text: {message}"))
+        self.ai_draft_worker.finished.connect(self.on_ai_draft_finished)
+
+        self.draft_ai_button.setEnabled(False)
+        self.draft_ai_button.setText("Drafting...")
+        self.generate_report_button.setEnabled(False)
+        self.ai_draft_worker.start()
+
+    def on_ai_draft_text(self, field, text):
+        text_edit = self.summary_text if field == 'summary' else self.takeaways_text
+        text_edit.blockSignals(True)
+        text_edit.setPlainText(text)
+        text_edit.blockSignals(False)
+        text_edit.moveCursor(text_edit.textCursor().End)
+
+        # Refresh the preview at most once per debounce interval while text keeps arriving
+        self.dirty_preview_sections.add('ai_content')
+        if not self.preview_timer.isActive():
+            self.preview_timer.start()
+
+    def on_ai_draft_finished(self):
+        self.ai_draft_worker.deleteLater()
+        self.ai_draft_worker = None
+        self.draft_ai_button.setEnabled(True)
+        self.draft_ai_button.setText("Draft with AI")
+        self.generate_report_button.setEnabled(True)
+        self.schedule_preview('ai_content')
 
     def generate_report(self):
+        if self.startup_worker is not None:
+            QMessageBox.information(self, "Please wait", "The AI model is still loading")
+            return
         if not self.api_handler.model:
             QMessageBox.critical(self, "Error", "Please save your API Key first")
             return
+        if self.report_worker is not None or self.ai_draft_worker is not None:
+            return
+        if self.image_worker is not None:
+            QMessageBox.information(self, "Please wait", "Images are still being loaded")
+            return
 
-        try:
-            doc = Document()
-
-            # Define font settings
-            font_name = 'Times New Roman'
-            font_size = Pt(12)
-
-            # Apply default style
-            style = doc.styles['Normal']
-            style.font.name = font_name
-            style.font.size = font_size
-
-            # Add title
-            add_formatted_heading(doc, 'Event Report', size=14, center=True)
-
-            # Add event details
-            add_formatted_paragraph(doc, "Title", self.title_entry.text())
-            add_formatted_paragraph(doc, "Date", self.date_entry.text())
-            add_formatted_paragraph(doc, "Time", self.time_entry.text())
-            add_formatted_paragraph(doc, "Venue", self.venue_entry.text())
-
-            # Add participant count
-            num_participants = len(self.attendance_data) if self.attendance_data is not None else 0
-            add_formatted_paragraph(doc, "Number of Participants", str(num_participants))
-            add_formatted_paragraph(doc, "Name of Student Led Club", self.club_entry.text())
-
-            # Get summary and takeaways
-            original_description = self.description_text.toPlainText().strip()
-            summary = self.api_handler.get_summary(original_description)
-            takeaways = self.api_handler.get_takeaways(original_description)
-
-            # Add summary
-            add_formatted_heading(doc, 'Summary', 14)
-            paragraph = doc.add_paragraph()
-            run = paragraph.add_run(summary)
-            run.font.name = font_name
-            run.font.size = font_size
-
-            # Add takeaways
-            add_formatted_heading(doc, 'Key Problem-Focused Takeaways', 14)
-            for takeaway in takeaways:
-                paragraph = doc.add_paragraph()
-                
-                # Split the takeaway into title and description
-                if ':' in takeaway:
-                    title, description = takeaway.split(':', 1)
-                    # Add title in bold
-                    run = paragraph.add_run(title + ':')
-                    run.font.name = font_name
-                    run.font.size = font_size
-                    run.font.bold = True
-                    
-                    # Add description in normal font
-                    run = paragraph.add_run(description)
-                    run.font.name = font_name
-                    run.font.size = font_size
-                    run.font.bold = False
-                else:
-                    # If no title/description split, just add the whole takeaway
-                    run = paragraph.add_run(takeaway)
-                    run.font.name = font_name
-                    run.font.size = font_size
-
-            # Add images
-            if self.images:
-                doc.add_page_break()
-                add_formatted_heading(doc, 'Pictures', 14, center=True)
-                for img_data in self.images:
-                    img_paragraph = doc.add_paragraph()
-                    img_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    img_stream = img_data['image']
-                    img_paragraph.add_run().add_picture(img_stream, width=Inches(6))
-
-                    caption_para = doc.add_paragraph()
-                    caption_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    caption_run = caption_para.add_run(img_data['caption_widget'].text())
-                    caption_run.font.name = font_name
-                    caption_run.font.size = font_size
-
-            # Add flyer
-            if self.event_flyer:
-                doc.add_page_break()
-                add_formatted_heading(doc, 'Event Flyer', 14, center=True)
-                flyer_paragraph = doc.add_paragraph()
-                flyer_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                flyer_stream = convert_image_for_word(self.event_flyer)
-                flyer_paragraph.add_run().add_picture(flyer_stream, width=Inches(6))
-
-            # Add attendance data
-            if self.attendance_data is not None:
-                doc.add_page_break()
-                add_formatted_heading(doc, 'Participants List', 14)
-                formatted_df = format_attendance_table(self.attendance_data)
-                add_table_to_document(doc, formatted_df)
-
-            # Save the document
-            filename = f"Event Report {self.title_entry.text()}.docx".replace(" ", "_")  # Sanitize filename
-            doc.save(filename)
-            QMessageBox.information(self, "Success", f"Report generated successfully as {filename}")
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error generating report: {str(e)}")
+        builder = ReportBuilder(self.api_handler, self.collect_event(), image_cache=self.image_cache,
+                                attendance_store=self.attendance_store, section_cache=self.section_cache)
+        self.report_worker = ReportWorker(builder, self)
+        self.report_worker.progress.connect(self.on_report_progress)
+        self.report_worker.succeeded.connect(self.on_report_succeeded)
+        self.report_worker.failed.connect(self.on_report_failed)
+        self.report_worker.cancelled.connect(self.on_report_cancelled)
+        self.report_worker.finished.connect(self.on_report_finished)
+
+        self.generate_report_button.setEnabled(False)
+        self.cancel_report_button.setEnabled(True)
+        self.report_worker.start()
+
+    def cancel_report(self):
+        if self.report_worker is not None:
+            self.cancel_report_button.setEnabled(False)
+            self.report_progress_bar.setFormat("%p% - Cancelling...")
+            self.report_worker.requestInterruption()
+
+    def on_report_progress(self, done, total, label):
+        self.report_progress_bar.setMaximum(total)
+        self.report_progress_bar.setValue(done)
+        self.report_progress_bar.setFormat(f"%p% - {label}")
+
+    def on_report_succeeded(self, filename):
+        builder = self.report_worker.builder
+        size = format_size(builder.document_size)
+        message = f"Report generated successfully as {filename} ({size})"
+        icon = QMessageBox.Information
+        if builder.archive_warning:
+            message += f"\n\n{builder.archive_warning}"
+            icon = QMessageBox.Warning
+        # Stage timings and API usage sit behind "Show Details..." and are also in the metrics log
+        message_box = QMessageBox(icon, "Success", message, parent=self)
+        message_box.setDetailedText(builder.telemetry.summary())
+        message_box.exec_()
+
+    def on_report_failed(self, message):
+        QMessageBox.critical(self, "Error", f"Error generating report: {message}")
+
+    def on_report_cancelled(self):
+        QMessageBox.information(self, "Cancelled", "Report generation was cancelled")
+
+    def on_report_finished(self):
+        self.report_worker.deleteLater()
+        self.report_worker = None
+        self.generate_report_button.setEnabled(True)
+        self.cancel_report_button.setEnabled(False)
+        self.report_progress_bar.setValue(0)
+        self.report_progress_bar.setFormat("%p% - Idle")
+
+    def closeEvent(self, event):
+        # A running QThread must finish before its owner is destroyed
+        for worker in (self.report_worker, self.image_worker, self.startup_worker, self.ai_draft_worker):
+            if worker is not None:
+                worker.requestInterruption()
+                worker.wait()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     try:
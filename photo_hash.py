@@ -0,0 +1,76 @@
+import io
+
+# Bits (out of 64) two photos' hashes may differ by and still count as the same shot
+DUPLICATE_THRESHOLD = 6
+
+def average_hash(img):
+    """aHash: one bit per pixel of an 8x8 grayscale copy, set where it is brighter than the mean."""
+    from PIL import Image
+
+    pixels = list(img.convert('L').resize((8, 8), Image.BILINEAR).getdata())
+    mean = sum(pixels) / len(pixels)
+    return sum(1 << i for i, pixel in enumerate(pixels) if pixel > mean)
+
+def difference_hash(img):
+    """dHash: one bit per neighbouring pixel pair of a 9x8 grayscale copy, set where brightness rises."""
+    from PIL import Image
+
+    pixels = list(img.convert('L').resize((9, 8), Image.BILINEAR).getdata())
+    bits = (pixels[row * 9 + col] < pixels[row * 9 + col + 1] for row in range(8) for col in range(8))
+    return sum(1 << i for i, bit in enumerate(bits) if bit)
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def hashed_thumbnail(make_thumbnail, path):
+    """Returns (thumbnail bytes, (aHash, dHash)). The hashes come from the small thumbnail, so the
+    photo is not decoded again; picklable for the ingest process pool."""
+    from PIL import Image
+
+    thumbnail_bytes = make_thumbnail(path)
+    with Image.open(io.BytesIO(thumbnail_bytes)) as thumbnail:
+        return thumbnail_bytes, (average_hash(thumbnail), difference_hash(thumbnail))
+
+class PhotoIndex:
+    """Near-duplicate lookup over the photos added so far: a BK-tree on the dHash, so a query
+    only visits the branches that can hold a hash within `threshold` bits, with the aHash
+    as a second check to keep false matches down."""
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.root = None
+        self.size = 0
+
+    def find(self, hashes):
+        """The item of the closest indexed photo within the threshold, or None."""
+        if self.root is None:
+            return None
+        ahash, dhash = hashes
+        best, best_distance = None, None
+        stack = [self.root]
+        while stack:
+            node_hashes, item, children = stack.pop()
+            distance = hamming(dhash, node_hashes[1])
+            if (distance <= self.threshold and hamming(ahash, node_hashes[0]) <= self.threshold
+                    and (best_distance is None or distance < best_distance)):
+                best, best_distance = item, distance
+            # Triangle inequality: only children at distance +/- threshold can match
+            for child_distance, child in children.items():
+                if abs(child_distance - distance) <= self.threshold:
+                    stack.append(child)
+        return best
+
+    def add(self, hashes, item):
+        node = (hashes, item, {})
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming(hashes[1], current[0][1])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
@@ -0,0 +1,322 @@
+import io
+import os
+
+from section_cache import fingerprint, file_identity, frame_digest
+from telemetry import Telemetry
+from utils import (prepare_image_file, parse_event_date, format_attendance_table, add_table_to_document,
+                   add_formatted_heading, add_formatted_paragraph, apply_report_styles,
+                   BODY_STYLE, LABEL_STYLE, CAPTION_STYLE, PICTURE_STYLE)
+
+class ReportCancelled(Exception):
+    pass
+
+def report_filename(title, *parts):
+    """Event_Report_<title>[_<part>...].docx, with characters that would start a folder replaced."""
+    name = " ".join(["Event Report", title] + [str(part) for part in parts if part])
+    return f"{name}.docx".replace(" ", "_").replace("/", "-").replace("\\", "-")
+
+class ReportBuilder:
+    """Builds the event report one stage at a time so each stage can be timed and cancelled.
+
+    `event` is a plain dict snapshot of the form (title, date, time, venue, club,
+    hours, description, images, flyer, attendance_data, attendance_cleaning, refresh_ai,
+    and optionally a reviewed summary and takeaways), so the builder never touches Qt widgets. Images and the
+    flyer are file paths or converted streams.
+    Each stage is a telemetry span; the record is appended to the metrics log at the end.
+
+    With a `section_cache` from an earlier build, every section (header, summary, takeaways,
+    each picture, flyer, participants) is fingerprinted by its inputs and only the changed
+    ones are rendered again; the rest of the cached document is reused as it is.
+    """
+
+    def __init__(self, api_handler, event, output_dir='', image_encoding=None, image_cache=None,
+                 telemetry=None, attendance_store=None, section_cache=None, filename=None):
+        self.api_handler = api_handler
+        self.event = event
+        self.output_dir = output_dir
+        self.image_encoding = image_encoding or {}
+        self.image_cache = image_cache
+        self.attendance_store = attendance_store
+        self.section_cache = section_cache
+        self.section_order = []
+        self.sections_reused = 0
+        self.attendance_digest = None
+        self.archive_warning = None
+        self.doc = None
+        self.summary = ''
+        self.takeaways = []
+        # Batch and service runs pass a name that is unique per entry
+        self.report_name = filename
+        self.filename = None
+        self.document_size = 0
+        self.stage_times = {}
+        self.is_cancelled = None
+        self.telemetry = telemetry or Telemetry(event.get('title', ''))
+
+    def stages(self):
+        return [
+            ('header', "Adding event details", self.add_header),
+            ('ai_content', "Generating AI summary and takeaways", self.generate_ai_content),
+            ('summary', "Adding summary", self.add_summary),
+            ('takeaways', "Adding takeaways", self.add_takeaways),
+            ('pictures', "Adding pictures", self.add_pictures),
+            ('flyer', "Adding event flyer", self.add_flyer),
+            ('participants', "Adding participants list", self.add_participants),
+            ('save', "Saving document", self.save),
+            ('archive', "Archiving attendance", self.archive_attendance),
+        ]
+
+    def run(self, progress=None, is_cancelled=None):
+        """Runs every stage in order. `progress(done, total, label)` is called before each one."""
+        self.is_cancelled = is_cancelled
+        stages = self.stages()
+        status = 'failed'
+        try:
+            for i, (name, label, stage) in enumerate(stages):
+                self.check_cancelled()
+                if progress:
+                    progress(i, len(stages), label)
+                with self.telemetry.span(name):
+                    stage()
+            status = 'succeeded'
+        except ReportCancelled:
+            status = 'cancelled'
+            raise
+        finally:
+            if status != 'succeeded' and self.section_cache is not None:
+                self.section_cache.clear()
+            self.stage_times.update(self.telemetry.stage_times())
+            self.telemetry.write(status=status, filename=self.filename,
+                                 document_size=self.document_size,
+                                 images=len(self.event.get('images') or []),
+                                 participants=self.participant_count(),
+                                 attendance_cleaning=self.cleaning_counts(),
+                                 sections_reused=self.sections_reused)
+        if progress:
+            progress(len(stages), len(stages), "Done")
+        return self.filename
+
+    def check_cancelled(self):
+        if self.is_cancelled and self.is_cancelled():
+            raise ReportCancelled("Report generation cancelled")
+
+    def participant_count(self):
+        attendance_data = self.event.get('attendance_data')
+        return len(attendance_data) if attendance_data is not None else 0
+
+    def cleaning_counts(self):
+        """Rows dropped while cleaning the attendance list, for the metrics log only."""
+        cleaning = self.event.get('attendance_cleaning')
+        if not cleaning:
+            return None
+        return {key: value for key, value in cleaning.items() if key != 'duplicate_ids'}
+
+    def attendance_fingerprint(self):
+        if self.attendance_digest is None:
+            attendance_data = self.event.get('attendance_data')
+            self.attendance_digest = frame_digest(attendance_data) if attendance_data is not None else ''
+        return self.attendance_digest
+
+    def render_section(self, key, inputs, render):
+        """Calls render() to append the section to the document, unless the cached document
+        already holds it rendered from the same inputs. `inputs=None` always renders."""
+        self.section_order.append(key)
+        cache = self.section_cache
+        if cache is None:
+            render()
+            return
+
+        digest = fingerprint(key, inputs) if inputs is not None else None
+        if digest is not None and cache.get(key, digest) is not None:
+            self.sections_reused += 1
+            return
+
+        cache.discard(key)
+        body = self.doc.element.body
+        # New content goes in just before the trailing sectPr
+        start = len(body) - (1 if body.sectPr is not None else 0)
+        render()
+        end = len(body) - (1 if body.sectPr is not None else 0)
+        cache.put(key, digest, list(body)[start:end])
+
+    def add_header(self):
+        from docx import Document
+
+        if self.section_cache is not None and self.section_cache.doc is not None:
+            self.doc = self.section_cache.doc
+        else:
+            self.doc = Document()
+            # Fonts live in the document's styles, not on each run
+            apply_report_styles(self.doc)
+            if self.section_cache is not None:
+                self.section_cache.doc = self.doc
+
+        inputs = [self.event.get(field) for field in ('title', 'date', 'time', 'venue', 'club')]
+        self.render_section('header', inputs + [self.participant_count()], self.add_header_content)
+
+    def add_header_content(self):
+        # Add title
+        add_formatted_heading(self.doc, 'Event Report', size=14, center=True)
+
+        # Add event details
+        add_formatted_paragraph(self.doc, "Title", self.event['title'])
+        add_formatted_paragraph(self.doc, "Date", self.event['date'])
+        add_formatted_paragraph(self.doc, "Time", self.event['time'])
+        add_formatted_paragraph(self.doc, "Venue", self.event['venue'])
+
+        # Add participant count
+        add_formatted_paragraph(self.doc, "Number of Participants", str(self.participant_count()))
+        add_formatted_paragraph(self.doc, "Name of Student Led Club", self.event['club'])
+
+    def generate_ai_content(self):
+        # Text drafted and reviewed in the GUI is used as it is
+        if self.event.get('summary'):
+            self.summary = self.event['summary']
+            self.takeaways = self.event.get('takeaways') or []
+            return
+
+        description = self.event['description'].strip()
+        refresh = self.event.get('refresh_ai', False)
+        cache = self.section_cache
+        if cache is not None:
+            digest = fingerprint(self.api_handler.model_name, description)
+            if not refresh and cache.ai_content and cache.ai_content[0] == digest:
+                self.summary, self.takeaways = cache.ai_content[1]
+                return
+
+        self.summary, self.takeaways = self.api_handler.get_summary_and_takeaways(
+            description, refresh=refresh, telemetry=self.telemetry)
+        if cache is not None:
+            cache.ai_content = (digest, (self.summary, self.takeaways))
+
+    def add_summary(self):
+        self.render_section('summary', [self.summary], self.add_summary_content)
+
+    def add_summary_content(self):
+        add_formatted_heading(self.doc, 'Summary', 14)
+        self.doc.add_paragraph(self.summary, style=BODY_STYLE)
+
+    def add_takeaways(self):
+        self.render_section('takeaways', [self.takeaways], self.add_takeaways_content)
+
+    def add_takeaways_content(self):
+        add_formatted_heading(self.doc, 'Key Problem-Focused Takeaways', 14)
+        for takeaway in self.takeaways:
+            paragraph = self.doc.add_paragraph(style=BODY_STYLE)
+
+            # Title in bold, when the model gave one, then the description
+            if takeaway['title']:
+                paragraph.add_run(takeaway['title'] + ':', style=LABEL_STYLE)
+                paragraph.add_run(' ' + takeaway['description'])
+            else:
+                paragraph.add_run(takeaway['description'])
+
+    def load_image(self, img_data):
+        """Returns a Word-ready stream, converting from the file path only now so that a single
+        image is held in memory at a time. Batch runs hand over already converted streams."""
+        image = img_data.get('image') or img_data.get('path')
+        if hasattr(image, 'read'):
+            image.seek(0)
+            return image
+        if self.image_cache:
+            return io.BytesIO(self.image_cache.word_image(image, **self.image_encoding))
+        return io.BytesIO(prepare_image_file(image, **self.image_encoding))
+
+    def image_inputs(self, image):
+        """Fingerprint inputs for an image path, or None for a stream, which is always rendered."""
+        if hasattr(image, 'read'):
+            return None
+        return [file_identity(image), self.image_encoding]
+
+    def add_pictures(self):
+        images = self.event.get('images')
+        if not images:
+            return
+
+        self.render_section('pictures', [], self.add_pictures_heading)
+        seen = {}
+        for img_data in images:
+            self.check_cancelled()
+            image = img_data.get('image') or img_data.get('path')
+            inputs = self.image_inputs(image)
+            # Keyed on the file rather than the position, so removing one photo keeps the rest
+            name = str(image) if inputs is not None else 'stream'
+            seen[name] = seen.get(name, 0) + 1
+            self.render_section(('picture', name, seen[name]),
+                                inputs and inputs + [img_data['caption']],
+                                lambda: self.add_picture(img_data))
+
+    def add_pictures_heading(self):
+        self.doc.add_page_break()
+        add_formatted_heading(self.doc, 'Pictures', 14, center=True)
+
+    def add_picture(self, img_data):
+        from docx.shared import Inches
+
+        with self.telemetry.span('load_image'):
+            image = self.load_image(img_data)
+        img_paragraph = self.doc.add_paragraph(style=PICTURE_STYLE)
+        img_paragraph.add_run().add_picture(image, width=Inches(6))
+
+        self.doc.add_paragraph(img_data['caption'], style=CAPTION_STYLE)
+
+    def add_flyer(self):
+        flyer = self.event.get('flyer')
+        if not flyer:
+            return
+
+        self.render_section('flyer', self.image_inputs(flyer), self.add_flyer_content)
+
+    def add_flyer_content(self):
+        from docx.shared import Inches
+
+        self.doc.add_page_break()
+        add_formatted_heading(self.doc, 'Event Flyer', 14, center=True)
+        flyer_paragraph = self.doc.add_paragraph(style=PICTURE_STYLE)
+        flyer_paragraph.add_run().add_picture(self.load_image({'image': self.event['flyer']}),
+                                              width=Inches(6))
+
+    def add_participants(self):
+        if self.event.get('attendance_data') is None:
+            return
+
+        self.render_section('participants',
+                            [self.attendance_fingerprint()],
+                            self.add_participants_content)
+
+    def add_participants_content(self):
+        attendance_data = self.event['attendance_data']
+        self.doc.add_page_break()
+        add_formatted_heading(self.doc, 'Participants List', 14)
+        with self.telemetry.span('format_table', rows=len(attendance_data)):
+            formatted_df = format_attendance_table(attendance_data)
+        with self.telemetry.span('build_table', rows=len(formatted_df)):
+            add_table_to_document(self.doc, formatted_df)
+
+    def save(self):
+        filename = self.report_name or report_filename(self.event['title'])
+        self.filename = os.path.join(self.output_dir, filename)
+        if self.section_cache is not None:
+            self.section_cache.assemble(self.section_order)
+        self.doc.save(self.filename)
+        self.document_size = os.path.getsize(self.filename)
+
+    def archive_attendance(self):
+        # Saved for semester_report.py; regenerating the same event replaces its rows
+        attendance_data = self.event.get('attendance_data')
+        if self.attendance_store is None or attendance_data is None:
+            return
+        # The semester report filters on the date as text, so only ISO dates can be archived
+        if parse_event_date(self.event.get('date')) is None:
+            self.archive_warning = (f"Attendance was not archived: the event date "
+                                    f"'{self.event.get('date') or ''}' is not a YYYY-MM-DD date")
+            return
+        cache = self.section_cache
+        digest = fingerprint([self.event.get(field) for field in ('title', 'date', 'time', 'venue',
+                                                                  'club', 'hours')],
+                             self.attendance_fingerprint(), self.attendance_store.path)
+        if cache is not None and cache.archived == digest:
+            return
+        self.attendance_store.record_event(self.event, attendance_data)
+        if cache is not None:
+            cache.archived = digest
@@ -0,0 +1,288 @@
+"""Headless report service: keeps the model client, libraries and caches warm and builds
+reports submitted over a localhost HTTP API or a Unix socket.
+
+    python report_service.py --port 8765 --workers 2 --queue-size 20
+
+    POST /jobs          event fields as in a batch manifest (title, date, time, hours, venue,
+                        club, description, images, captions, flyer, attendance, refresh);
+                        202 with the job, or 503 when the queue is full
+    GET  /jobs/<id>     job status, current stage, output file, timings and token estimate
+    GET  /jobs          recent jobs, newest first
+    GET  /metrics       queue depth, busy workers, throughput and API usage
+    GET  /health        liveness check
+
+Relative file paths are resolved against --base-dir. The service only listens on the
+loopback interface (or a Unix socket), since requests name files on this machine.
+"""
+import argparse
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch_cli import add_pipeline_arguments, create_pipeline, parse_entry, build_report
+from report_builder import report_filename
+from utils import warm_up_imports
+
+MAX_REQUEST_BYTES = 1024 * 1024
+
+class ReportService:
+    """A bounded job queue drained by a fixed pool of report worker threads."""
+
+    def __init__(self, api_handler, output_dir='reports', workers=2, queue_size=20, processes=None,
+                 image_encoding=None, image_cache=None, attendance_store=None, metrics_log=None,
+                 max_jobs_kept=1000):
+        self.api_handler = api_handler
+        self.output_dir = output_dir
+        self.image_encoding = image_encoding or {}
+        self.image_cache = image_cache
+        self.attendance_store = attendance_store
+        self.metrics_log = metrics_log
+        self.max_jobs_kept = max_jobs_kept
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.busy = 0
+        self.totals = {'started': 0, 'succeeded': 0, 'failed': 0, 'tokens': 0, 'api_calls': 0,
+                       'retries': 0, 'seconds': 0.0, 'wait': 0.0}
+        self.started = time.time()
+        self.process_pool = ProcessPoolExecutor(max_workers=processes)
+        self.workers = [threading.Thread(target=self._work, name=f"report-worker-{i}", daemon=True)
+                        for i in range(workers)]
+
+    def start(self):
+        # Import the heavy libraries and start the worker processes before the first job
+        warm_up_imports()
+        self.process_pool.submit(warm_up_imports).result()
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.process_pool.shutdown()
+        if self.image_cache:
+            self.image_cache.evict()
+
+    def submit(self, request, base_dir):
+        """Validates and queues a job; raises ValueError for a bad request and queue.Full when busy."""
+        entry = parse_entry(request, base_dir)
+        job_id = uuid.uuid4().hex[:12]
+        # Jobs for the same event may run at the same time, so each writes its own file
+        entry['filename'] = report_filename(entry['title'], entry['date'], job_id)
+        job = {
+            'id': job_id,
+            'title': entry['title'],
+            'status': 'queued',
+            'stage': None,
+            'submitted': time.time(),
+            'started': None,
+            'finished': None,
+            'filename': None,
+            'document_size': None,
+            'stage_times': {},
+            'tokens': None,
+            'token_estimate': self.api_handler.estimate_request(entry['description']),
+            'error': None,
+        }
+        with self.lock:
+            self.queue.put_nowait((job['id'], entry, bool(request.get('refresh'))))
+            self.jobs[job['id']] = job
+            while len(self.jobs) > self.max_jobs_kept:
+                self.jobs.popitem(last=False)
+        return dict(job)
+
+    def job(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self, limit=50):
+        with self.lock:
+            return [dict(job) for job in reversed(self.jobs.values())][:limit]
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            job_id, entry, refresh = item
+            started = time.time()
+            with self.lock:
+                self.busy += 1
+                self.totals['started'] += 1
+                job = self.jobs.get(job_id)
+                if job:
+                    job.update(status='running', started=started)
+                    self.totals['wait'] += started - job['submitted']
+
+            def progress(done, total, label):
+                self._update(job_id, stage=label)
+
+            try:
+                builder = build_report(entry, self.api_handler, self.process_pool, self.output_dir,
+                                       refresh, self.image_encoding, self.image_cache,
+                                       self.metrics_log, self.attendance_store, progress)
+            except Exception as e:
+                with self.lock:
+                    self.totals['failed'] += 1
+                self._update(job_id, status='failed', error=str(e), finished=time.time())
+            else:
+                tokens = builder.telemetry.token_totals()['total_tokens']
+                with self.lock:
+                    self.totals['succeeded'] += 1
+                    self.totals['tokens'] += tokens
+                    self.totals['api_calls'] += len(builder.telemetry.api_calls)
+                    self.totals['retries'] += sum(call['retries'] for call in builder.telemetry.api_calls)
+                    self.totals['seconds'] += time.time() - started
+                self._update(job_id, status='succeeded', filename=os.path.abspath(builder.filename),
+                             document_size=builder.document_size, stage_times=builder.stage_times,
+                             tokens=tokens, archive_warning=builder.archive_warning,
+                             finished=time.time())
+            finally:
+                with self.lock:
+                    self.busy -= 1
+                self.queue.task_done()
+
+    def metrics(self):
+        with self.lock:
+            succeeded, started = self.totals['succeeded'], self.totals['started']
+            uptime = time.time() - self.started
+            return {
+                'uptime_seconds': round(uptime, 1),
+                'queue_depth': self.queue.qsize(),
+                'queue_capacity': self.queue.maxsize,
+                'workers': len(self.workers),
+                'busy_workers': self.busy,
+                'jobs_started': started,
+                'jobs_succeeded': succeeded,
+                'jobs_failed': self.totals['failed'],
+                'reports_per_minute': round(succeeded / uptime * 60, 2) if uptime else 0.0,
+                'avg_build_seconds': round(self.totals['seconds'] / succeeded, 2) if succeeded else None,
+                'avg_queue_wait_seconds': round(self.totals['wait'] / started, 2) if started else None,
+                'api_calls': self.totals['api_calls'],
+                'api_retries': self.totals['retries'],
+                'tokens': self.totals['tokens'],
+            }
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    server_version = "NSSReportService/1.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == '/health':
+            self.send_json(200, {'status': 'ok', 'model_ready': bool(self.service.api_handler.model)})
+        elif path == '/metrics':
+            self.send_json(200, self.service.metrics())
+        elif path == '/jobs':
+            self.send_json(200, {'jobs': self.service.list_jobs()})
+        elif path.startswith('/jobs/'):
+            job = self.service.job(path[len('/jobs/'):])
+            if job:
+                self.send_json(200, job)
+            else:
+                self.send_json(404, {'error': "No such job"})
+        else:
+            self.send_json(404, {'error': "Not found"})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            self.send_json(404, {'error': "Not found"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_BYTES:
+            self.send_json(413, {'error': "Request too large"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("Expected a JSON object with the event fields")
+            job = self.service.submit(request, self.server.base_dir)
+        except queue.Full:
+            self.send_json(503, {'error': "The job queue is full, try again shortly"},
+                           {'Retry-After': '5'})
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            # Always answer, so a bug never leaves the client with a dropped connection
+            self.send_json(500, {'error': f"Could not queue the job: {str(e)}"})
+        else:
+            self.send_json(202, job, {'Location': f"/jobs/{job['id']}"})
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def make_server(service, host='127.0.0.1', port=8765, socket_path=None, base_dir='.'):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, ServiceRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    server.service = service
+    server.base_dir = os.path.abspath(base_dir)
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve NSS report generation on localhost.")
+    parser.add_argument('--port', type=int, default=8765, help="Port on 127.0.0.1")
+    parser.add_argument('--socket', help="Listen on this Unix socket path instead of a port")
+    parser.add_argument('--workers', type=int, default=2, help="Reports built at the same time")
+    parser.add_argument('--queue-size', type=int, default=20, help="Jobs allowed to wait before 503s")
+    parser.add_argument('--base-dir', default='.', help="Folder that relative file paths start from")
+    add_pipeline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    api_handler, image_encoding, image_cache, attendance_store = create_pipeline(args, parser)
+    service = ReportService(api_handler, args.output_dir, args.workers, args.queue_size, args.processes,
+                            image_encoding, image_cache, attendance_store, args.metrics_log)
+    service.start()
+    server = make_server(service, port=args.port, socket_path=args.socket, base_dir=args.base_dir)
+    print(f"Serving reports on {args.socket or f'http://127.0.0.1:{args.port}'} "
+          f"with {args.workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        if attendance_store:
+            attendance_store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
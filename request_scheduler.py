@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+
+class RequestDeadlineExceeded(Exception):
+    pass
+
+def is_rate_limit(error):
+    # google.api_core errors and urllib's HTTPError both carry the HTTP status as `code`
+    return getattr(error, 'code', None) == 429
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `capacity`.
+
+    `pause(seconds)` holds back every caller, which is how a 429 from one thread slows
+    down the whole batch instead of each thread finding the limit on its own.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, deadline=None):
+        """Waits for a token; raises RequestDeadlineExceeded if it would arrive after `deadline`."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            if deadline is not None and now + wait > deadline:
+                raise RequestDeadlineExceeded("Rate limit would delay the request past its deadline")
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+class RequestScheduler:
+    """Runs backend requests under a shared rate limit, retrying transient errors with
+    exponential backoff and full jitter, all within a per-request deadline.
+
+    `requests_per_minute` of None disables the rate limit but keeps retries and deadlines.
+    By default up to ten seconds' worth of requests may go out in a burst.
+    """
+
+    def __init__(self, requests_per_minute=None, burst=None, max_retries=4, base_delay=1.0,
+                 max_delay=30.0):
+        self.bucket = None
+        if requests_per_minute:
+            burst = burst or max(1, int(requests_per_minute // 6))
+            self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, retries, retry_after=None):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retries))
+        return max(delay, retry_after or 0)
+
+    def call(self, request, timeout, is_retryable):
+        """Calls `request(timeout)` and returns (result, retries).
+
+        `timeout` is the deadline for the whole call, retries included; each attempt is given
+        whatever time is left. An error that is not retryable, or the last one, is re-raised
+        with a `retries` attribute for telemetry.
+        """
+        deadline = time.monotonic() + timeout
+        retries = 0
+        while True:
+            try:
+                if self.bucket:
+                    self.bucket.acquire(deadline)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RequestDeadlineExceeded(f"No response within {timeout} seconds")
+                return request(remaining), retries
+            except RequestDeadlineExceeded as e:
+                e.retries = retries
+                raise
+            except Exception as e:
+                if retries >= self.max_retries or not is_retryable(e):
+                    e.retries = retries
+                    raise
+                delay = self.backoff(retries, getattr(e, 'retry_after', None))
+                if is_rate_limit(e) and self.bucket:
+                    self.bucket.pause(delay)
+                if time.monotonic() + delay >= deadline:
+                    e.retries = retries
+                    raise
+                retries += 1
+                time.sleep(delay)
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+
+def fingerprint(*parts):
+    """A digest of a section's inputs; parts must be JSON-serialisable."""
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def file_identity(path):
+    """Path, size and mtime, so an edited file changes the fingerprint of the section showing it."""
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+def frame_digest(df):
+    import pandas as pd
+
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    digest.update(json.dumps(list(map(str, df.columns))).encode('utf-8'))
+    return digest.hexdigest()
+
+class SectionCache:
+    """The last built document plus the fingerprint and body elements of each section in it.
+
+    ReportBuilder keeps the cached document and replaces only the sections whose inputs
+    changed, then puts the sections back in report order before saving. One cache serves
+    one report at a time; it is cleared whenever a build does not finish, since the
+    document may then be half edited.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.doc = None
+        self.sections = {}
+        self.ai_content = None
+        self.archived = None
+
+    def get(self, key, digest):
+        """The section's elements if it was rendered from the same inputs, else None."""
+        section = self.sections.get(key)
+        if section is not None and section['fingerprint'] == digest:
+            return section['elements']
+        return None
+
+    def put(self, key, digest, elements):
+        self.sections[key] = {'fingerprint': digest, 'elements': elements}
+
+    def discard(self, key):
+        section = self.sections.pop(key, None)
+        if section is not None:
+            for element in section['elements']:
+                parent = element.getparent()
+                if parent is not None:
+                    parent.remove(element)
+
+    def assemble(self, order):
+        """Moves the sections' elements into `order`, drops sections no longer in the report
+        and unlinks images nothing refers to any more, so they are not saved."""
+        for key in [key for key in self.sections if key not in set(order)]:
+            self.discard(key)
+
+        body = self.doc.element.body
+        sect_pr = body.sectPr
+        for key in order:
+            for element in self.sections[key]['elements']:
+                if sect_pr is not None:
+                    sect_pr.addprevious(element)
+                else:
+                    body.append(element)
+
+        from docx.opc.constants import RELATIONSHIP_TYPE as RT
+
+        used = set(body.xpath('.//a:blip/@r:embed'))
+        part = self.doc.part
+        for rId, rel in list(part.rels.items()):
+            if rel.reltype == RT.IMAGE and rId not in used:
+                part.drop_rel(rId)
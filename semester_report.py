@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import time
+
+from attendance_store import AttendanceStore
+
+EVENT_HEADERS = ['Sr. No.', 'Date', 'Time', 'Event', 'Club', 'Participants', 'Hours']
+VOLUNTEER_HEADERS = ['Sr. No.', 'Application ID', 'Name', 'Events', 'Hours']
+
+def format_hours(value):
+    return f"{value:g}" if value else "-"
+
+def build_semester_report(store, output_path, start=None, end=None, title="Semester Summary"):
+    """Writes the aggregate .docx from the attendance store and returns the totals."""
+    from docx import Document
+    from utils import (apply_report_styles, add_formatted_heading, add_formatted_paragraph,
+                       add_table_to_document)
+
+    totals = store.totals(start, end)
+    events = store.event_summary(start, end)
+    volunteers = store.volunteer_summary(start, end)
+
+    doc = Document()
+    apply_report_styles(doc)
+    add_formatted_heading(doc, f"NSS {title}", center=True)
+    add_formatted_paragraph(doc, "Period", f"{start or 'the first event'} to {end or 'the latest event'}")
+    add_formatted_paragraph(doc, "Events", str(totals['events']))
+    add_formatted_paragraph(doc, "Event Hours", format_hours(totals['event_hours']))
+    add_formatted_paragraph(doc, "Total Attendance", str(totals['attendances']))
+    add_formatted_paragraph(doc, "Distinct Volunteers", str(totals['volunteers']))
+    add_formatted_paragraph(doc, "Volunteer Hours", format_hours(totals['volunteer_hours']))
+
+    add_formatted_heading(doc, "Events")
+    events.insert(0, 'sr_no', range(1, len(events) + 1))
+    events['hours'] = events['hours'].map(format_hours)
+    add_table_to_document(doc, events.fillna(''), EVENT_HEADERS)
+
+    doc.add_page_break()
+    add_formatted_heading(doc, "Volunteers")
+    volunteers.insert(0, 'sr_no', range(1, len(volunteers) + 1))
+    volunteers['hours'] = volunteers['hours'].map(format_hours)
+    add_table_to_document(doc, volunteers, VOLUNTEER_HEADERS)
+
+    doc.save(output_path)
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise archived attendance across events.")
+    parser.add_argument('--db', default='attendance.sqlite3', help="Attendance store written by the app")
+    parser.add_argument('--start', help="First date to include (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last date to include (YYYY-MM-DD)")
+    parser.add_argument('-o', '--output', default='Semester_Summary.docx', help="Summary .docx to write")
+    parser.add_argument('--volunteer', help="List the events one application ID attended instead")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"No attendance store at {args.db}; generate some reports first")
+
+    store = AttendanceStore(args.db)
+    try:
+        if args.volunteer:
+            events = store.events_for(args.volunteer, args.start, args.end)
+            if events.empty:
+                print(f"No events found for {args.volunteer}")
+                return 1
+            print(events.to_string(index=False))
+            print(f"{len(events)} events, {events['hours'].astype(float).sum():g} hours")
+            return 0
+
+        start = time.perf_counter()
+        totals = build_semester_report(store, args.output, args.start, args.end)
+    finally:
+        store.close()
+
+    print(f"Wrote {args.output} in {time.perf_counter() - start:.1f}s: {totals['events']} events, "
+          f"{totals['volunteers']} volunteers, {totals['attendances']} attendances")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_LOG = "report_metrics.jsonl"
+
+_log_lock = threading.Lock()
+
+def usage_from_response(response):
+    """Reads Gemini's token counts from response.usage_metadata, if it has them."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return {}
+    return {
+        'prompt_tokens': getattr(usage, 'prompt_token_count', 0) or 0,
+        'output_tokens': getattr(usage, 'candidates_token_count', 0) or 0,
+        'total_tokens': getattr(usage, 'total_token_count', 0) or 0,
+    }
+
+class Telemetry:
+    """Timing spans and API call records for one report, written as one JSON line when done.
+
+    Spans can nest; each records its parent, its start offset from the start of the
+    report and its duration. API calls record latency, retries, token usage and
+    whether the reply came from the cache. Safe to use from several threads.
+    """
+
+    def __init__(self, report='', log_path=METRICS_LOG):
+        self.report = report
+        self.log_path = log_path
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.start = time.perf_counter()
+        self.spans = []
+        self.api_calls = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @contextmanager
+    def span(self, name, **fields):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            record = {'name': name, 'parent': parent, 'start': round(start - self.start, 4),
+                      'seconds': round(duration, 4)}
+            record.update(fields)
+            with self.lock:
+                self.spans.append(record)
+
+    def record_api_call(self, kind, latency, retries=0, usage=None, cached=False, error=None):
+        record = {'kind': kind, 'seconds': round(latency, 4), 'retries': retries,
+                  'cached': cached}
+        record.update(usage or {})
+        if error:
+            record['error'] = error
+        with self.lock:
+            self.api_calls.append(record)
+
+    def stage_times(self):
+        """Seconds per top-level span, in the order they finished."""
+        return {span['name']: span['seconds'] for span in self.spans if span['parent'] is None}
+
+    def token_totals(self):
+        totals = {'prompt_tokens': 0, 'output_tokens': 0, 'total_tokens': 0}
+        for call in self.api_calls:
+            for key in totals:
+                totals[key] += call.get(key, 0)
+        return totals
+
+    def to_record(self, **fields):
+        record = {
+            'time': self.started_at,
+            'report': self.report,
+            'total_seconds': round(time.perf_counter() - self.start, 4),
+            'api_seconds': round(sum(call['seconds'] for call in self.api_calls), 4),
+            'api_retries': sum(call['retries'] for call in self.api_calls),
+            'tokens': self.token_totals(),
+        }
+        record.update(fields)
+        record['spans'] = self.spans
+        record['api_calls'] = self.api_calls
+        return record
+
+    def write(self, **fields):
+        """Appends this report's record to the JSON-lines log; extra fields are added to it."""
+        if not self.log_path:
+            return
+        line = json.dumps(self.to_record(**fields))
+        with _log_lock:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def summary(self):
+        """A short plain-text breakdown for the GUI's details box or the CLI."""
+        lines = ["Stage timings:"]
+        for span in sorted(self.spans, key=lambda span: span['start']):
+            indent = "    " if span['parent'] else "  "
+            lines.append(f"{indent}{span['name']:<16} {span['seconds']:8.2f}s")
+
+        if self.api_calls:
+            tokens = self.token_totals()
+            cached = sum(1 for call in self.api_calls if call['cached'])
+            lines.append(f"API calls: {len(self.api_calls)} ({cached} cached), "
+                         f"{sum(call['retries'] for call in self.api_calls)} retries")
+            for call in self.api_calls:
+                source = "cache" if call['cached'] else f"{call.get('total_tokens', 0)} tokens"
+                lines.append(f"  {call['kind']:<16} {call['seconds']:8.2f}s  {source}")
+            lines.append(f"Tokens: {tokens['prompt_tokens']} prompt + {tokens['output_tokens']} output "
+                         f"= {tokens['total_tokens']}")
+        return "\n".join(lines)
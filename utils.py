@@ -1,8 +1,9 @@
 import os
-from PIL import Image
 import io
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from xml.sax.saxutils import escape as xml_escape
+
+# PIL, pandas and python-docx are imported inside the functions that use them so that
+# importing this module (and launching the GUI) stays fast
 
 def get_stored_api_key():
     """Reads the API key from a file if it exists."""
@@ -17,21 +18,273 @@ def save_api_key_to_file(api_key):
     with open("api_key.txt", "w") as file:
         file.write(api_key)
 
-def convert_image_for_word(img):
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
-    
-    max_width = 800
+# Embedded picture encoding: 'auto' picks JPEG for photos and PNG for images with
+# transparency or few colours (line-art flyers); 'jpeg' and 'png' force a format
+IMAGE_FORMAT = 'auto'
+JPEG_QUALITY = 85
+MIN_JPEG_QUALITY = 45
+MAX_IMAGE_WIDTH = 800
+MIN_IMAGE_WIDTH = 320
+LINE_ART_MAX_COLORS = 256
+
+def has_transparency(img):
+    if img.mode in ('RGBA', 'LA', 'PA'):
+        return img.getchannel('A').getextrema()[0] < 255
+    return img.mode == 'P' and 'transparency' in img.info
+
+def is_line_art(img):
+    """Flyers and graphics use few distinct colours; photos use thousands."""
+    from PIL import Image
+
+    sample = img.convert('RGB').resize((min(img.width, 200), min(img.height, 200)), Image.NEAREST)
+    return sample.getcolors(maxcolors=LINE_ART_MAX_COLORS) is not None
+
+def choose_image_format(img, image_format=IMAGE_FORMAT):
+    if image_format == 'png' or has_transparency(img):
+        return 'PNG'
+    if image_format == 'jpeg':
+        return 'JPEG'
+    return 'PNG' if is_line_art(img) else 'JPEG'
+
+def warm_up_imports():
+    """Imports the heavy libraries ahead of first use; meant for a background thread."""
+    import pandas  # noqa: F401
+    from PIL import Image  # noqa: F401
+    import docx  # noqa: F401
+
+def resize_for_word(img, max_width=MAX_IMAGE_WIDTH):
+    """Scales the image down to max_width. Smaller images are never upscaled."""
+    from PIL import Image
+
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if has_transparency(img) else 'RGB')
+
+    if img.width <= max_width:
+        # Decode now: callers often close the source file before encoding
+        img.load()
+        return img
     aspect_ratio = img.height / img.width
-    new_height = int(max_width * aspect_ratio)
-    img = img.resize((max_width, new_height), Image.LANCZOS)
+    new_height = max(1, int(max_width * aspect_ratio))
+    return img.resize((max_width, new_height), Image.LANCZOS)
 
+def encode_image(img, image_format, quality=JPEG_QUALITY):
     img_byte_arr = io.BytesIO()
-    img.save(img_byte_arr, format='PNG')
+    if image_format == 'JPEG':
+        img.convert('RGB').save(img_byte_arr, format='JPEG', quality=quality, optimize=True)
+    else:
+        img.save(img_byte_arr, format='PNG')
+    return img_byte_arr.getvalue()
+
+def encode_for_word(img, image_format=IMAGE_FORMAT, quality=JPEG_QUALITY, max_bytes=None):
+    """Encodes an already resized image, lowering quality and then size to fit max_bytes."""
+    from PIL import Image
+
+    chosen_format = choose_image_format(img, image_format)
+    data = encode_image(img, chosen_format, quality)
+    while max_bytes and len(data) > max_bytes:
+        if chosen_format == 'JPEG' and quality > MIN_JPEG_QUALITY:
+            quality = max(MIN_JPEG_QUALITY, quality - 10)
+        elif img.width > MIN_IMAGE_WIDTH:
+            img = img.resize((int(img.width * 0.8), max(1, int(img.height * 0.8))), Image.LANCZOS)
+        else:
+            break
+        data = encode_image(img, chosen_format, quality)
+    return data
+
+def convert_image_for_word(img, max_width=MAX_IMAGE_WIDTH, image_format=IMAGE_FORMAT,
+                           quality=JPEG_QUALITY, max_bytes=None):
+    img = resize_for_word(img, max_width)
+
+    img_byte_arr = io.BytesIO(encode_for_word(img, image_format, quality, max_bytes))
     img_byte_arr.seek(0)
 
     return img_byte_arr
 
+def process_image_file(path, thumbnail_size=(150, 150), max_width=MAX_IMAGE_WIDTH,
+                       image_format=IMAGE_FORMAT, quality=JPEG_QUALITY, max_bytes=None):
+    """Decodes a photo once and returns (thumbnail PNG bytes, Word-ready image bytes).
+
+    JPEGs are decoded at a reduced DCT scale that is still at least `max_width` wide,
+    so a 12 MP photo never has to be fully decoded.
+    """
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.draft('RGB', (max_width, max(1, max_width * img.height // img.width)))
+        word_img = resize_for_word(img, max_width)
+
+    word_bytes = encode_for_word(word_img, image_format, quality, max_bytes)
+
+    # The thumbnail is taken from the already resized image rather than a second decode
+    thumbnail = word_img.copy()
+    thumbnail.thumbnail(thumbnail_size)
+    thumbnail_byte_arr = io.BytesIO()
+    thumbnail.save(thumbnail_byte_arr, format='PNG')
+
+    return thumbnail_byte_arr.getvalue(), word_bytes
+
+def make_thumbnail(path, thumbnail_size=(150, 150)):
+    """Returns PNG thumbnail bytes, decoding JPEGs at the smallest scale that still covers the size."""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.draft('RGB', thumbnail_size)
+        thumbnail = img.copy()
+    thumbnail.thumbnail(thumbnail_size)
+    thumbnail_byte_arr = io.BytesIO()
+    thumbnail.save(thumbnail_byte_arr, format='PNG')
+    return thumbnail_byte_arr.getvalue()
+
+def prepare_image_file(path, **encoding):
+    """Opens an image and returns its Word-ready bytes (picklable, for process pools)."""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return convert_image_for_word(img, **encoding).getvalue()
+
+def format_size(num_bytes):
+    for unit in ('B', 'KB', 'MB'):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == 'B' else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+REQUIRED_ATTENDANCE_COLUMNS = ['name', 'application_id']
+CSV_CHUNK_SIZE = 50000
+
+def attendance_string_dtype():
+    import pandas as pd
+
+    # Arrow-backed strings take about a third of the memory of object columns; pyarrow is in
+    # requirements.txt, and older installs without it fall back to pandas' own string dtype
+    try:
+        import pyarrow  # noqa: F401
+        return pd.StringDtype('pyarrow')
+    except ImportError:
+        return pd.StringDtype()
+
+def excel_engine(path):
+    # calamine is much faster than openpyxl and also reads .xls; pandas opens openpyxl read-only
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return 'xlrd' if path.endswith('.xls') else 'openpyxl'
+
+def match_attendance_columns(columns):
+    """Maps the file's own column names to the required ones, ignoring case and spacing."""
+    lookup = {}
+    for col in columns:
+        lookup.setdefault(str(col).strip().lower(), col)
+
+    missing_columns = [col for col in REQUIRED_ATTENDANCE_COLUMNS if col not in lookup]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    return {lookup[col]: col for col in REQUIRED_ATTENDANCE_COLUMNS}
+
+def is_attendance_column(col):
+    return str(col).strip().lower() in REQUIRED_ATTENDANCE_COLUMNS
+
+def load_attendance_file(path):
+    """Reads only the name and application_id columns of a CSV/Excel participants list.
+
+    Only CSV is streamed column by column. An Excel sheet has to be parsed whole before its
+    columns can be dropped, even by calamine: a 50,000-row, 42-column .xlsx takes about 3s
+    against 0.2s for the same list as CSV.
+    """
+    import pandas as pd
+
+    dtype = attendance_string_dtype()
+    if path.endswith('.csv'):
+        chunks = pd.read_csv(path, usecols=is_attendance_column, dtype=dtype, chunksize=CSV_CHUNK_SIZE)
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = pd.read_excel(path, usecols=is_attendance_column, dtype=str,
+                           engine=excel_engine(path)).astype(dtype)
+
+    rename = match_attendance_columns(df.columns)
+    df = df[list(rename)].rename(columns=rename)
+    return df.fillna('')
+
+def clean_attendance(df):
+    """Normalises a name/application_id frame, drops blank rows and removes duplicates.
+
+    Returns (cleaned frame, report dict). Spacing is collapsed in both columns, IDs are
+    upper-cased, and all-upper or all-lower names are title-cased. Duplicates are found on
+    a 64-bit hash of the normalised application_id (or the lower-cased name when the ID is
+    blank), so the whole pass is vectorised and the first occurrence is kept.
+    """
+    import pandas as pd
+
+    # Arrow string columns are vectorised and stay compact; the regex replacement only runs
+    # on the few names that need it
+    names = df['name'].fillna('').astype(attendance_string_dtype()).str.strip()
+    spaced = names.str.contains('  ', regex=False) | names.str.contains('\t', regex=False)
+    names[spaced] = names[spaced].str.replace(r'\s+', ' ', regex=True)
+    one_case = names.str.isupper() | names.str.islower()
+    names[one_case] = names[one_case].str.title()
+    ids = (df['application_id'].fillna('').astype(attendance_string_dtype()).str.strip()
+           .str.replace(' ', '', regex=False).str.upper())
+
+    blank = (names == '') & (ids == '')
+    missing_id = (ids == '') & ~blank
+    keys = ids.copy()
+    keys[missing_id] = 'name:' + names[missing_id].str.lower()
+    key_hashes = pd.util.hash_pandas_object(keys, index=False)
+    duplicate = key_hashes.duplicated() & ~blank
+
+    keep = ~(blank | duplicate)
+    cleaned = pd.DataFrame({'name': names[keep], 'application_id': ids[keep]}).reset_index(drop=True)
+    cleaned = cleaned.astype(attendance_string_dtype())
+    report = {
+        'total_rows': len(df),
+        'blank_rows': int(blank.sum()),
+        'duplicate_rows': int(duplicate.sum()),
+        'missing_ids': int((missing_id & keep).sum()),
+        'kept_rows': len(cleaned),
+        'duplicate_ids': ids[duplicate & ~missing_id].drop_duplicates().head(10).tolist(),
+    }
+    return cleaned, report
+
+def describe_attendance_cleaning(report):
+    """One sentence on what clean_attendance removed, or '' when the list was already clean."""
+    if not report:
+        return ""
+    parts = []
+    if report['duplicate_rows']:
+        parts.append(f"{report['duplicate_rows']} duplicate")
+    if report['blank_rows']:
+        parts.append(f"{report['blank_rows']} blank")
+    text = ""
+    if parts:
+        text = (f"{' and '.join(parts)} rows were removed from the {report['total_rows']} "
+                f"uploaded, leaving {report['kept_rows']} participants.")
+        text = text[0].upper() + text[1:]
+    if report['missing_ids']:
+        text += f" {report['missing_ids']} participants have no application ID."
+    return text.strip()
+
+def load_clean_attendance(path):
+    """load_attendance_file followed by clean_attendance; returns (frame, report)."""
+    return clean_attendance(load_attendance_file(path))
+
+def parse_hours(value):
+    """An event duration in hours from free text, or None when blank or not a number."""
+    try:
+        hours = float(str(value or '').strip())
+    except ValueError:
+        return None
+    return hours if hours > 0 else None
+
+def parse_event_date(value):
+    """An ISO (YYYY-MM-DD) event date from free text, or None when blank or not a valid date."""
+    from datetime import datetime
+    try:
+        return datetime.strptime(str(value or '').strip(), '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
 def format_attendance_table(df):
     df = df.copy()
     df.columns = [col.lower() for col in df.columns]
@@ -39,51 +292,121 @@ def format_attendance_table(df):
     df.insert(0, 'sr_no', range(1, len(df) + 1))
     return df
 
-def add_table_to_document(doc, df):
+REPORT_FONT = 'Times New Roman'
+REPORT_FONT_SIZE = 12
+HEADING_FONT_SIZE = 14
+
+HEADING_STYLE = 'Report Heading'
+BODY_STYLE = 'Report Body'
+LABEL_STYLE = 'Report Label'
+CAPTION_STYLE = 'Report Caption'
+PICTURE_STYLE = 'Report Picture'
+PARTICIPANTS_TABLE_STYLE = 'Participants Table'
+PARTICIPANTS_HEADERS = ['Sr. No.', 'Name', 'Application ID']
+
+def _add_style(styles, name, style_type, bold=None, size=REPORT_FONT_SIZE, center=False):
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt, RGBColor
+
+    style = styles.add_style(name, style_type)
+    if style_type != WD_STYLE_TYPE.CHARACTER:
+        style.base_style = styles['Normal']
+        style.font.name = REPORT_FONT
+        style.font.size = Pt(size)
+    if bold is not None:
+        style.font.bold = bold
+    style.font.color.rgb = RGBColor(0, 0, 0)
+    if center:
+        style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    return style
+
+def apply_report_styles(doc):
+    """Defines the report's fonts once in the style part so runs don't carry their own."""
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.shared import Pt
+
+    styles = doc.styles
+    if HEADING_STYLE in [style.name for style in styles]:
+        return
+
+    normal = styles['Normal']
+    normal.font.name = REPORT_FONT
+    normal.font.size = Pt(REPORT_FONT_SIZE)
+
+    _add_style(styles, HEADING_STYLE, WD_STYLE_TYPE.PARAGRAPH, bold=True, size=HEADING_FONT_SIZE)
+    _add_style(styles, BODY_STYLE, WD_STYLE_TYPE.PARAGRAPH, bold=False)
+    _add_style(styles, CAPTION_STYLE, WD_STYLE_TYPE.PARAGRAPH, center=True)
+    _add_style(styles, PICTURE_STYLE, WD_STYLE_TYPE.PARAGRAPH, center=True)
+    _add_style(styles, LABEL_STYLE, WD_STYLE_TYPE.CHARACTER, bold=True)
+    get_participants_table_style(doc)
+
+def get_participants_table_style(doc):
+    """Table Grid plus Times New Roman 12pt black text and a bold header row, defined once."""
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    from docx.shared import Pt, RGBColor
+
+    styles = doc.styles
+    if PARTICIPANTS_TABLE_STYLE in [style.name for style in styles]:
+        return styles[PARTICIPANTS_TABLE_STYLE]
+
+    style = styles.add_style(PARTICIPANTS_TABLE_STYLE, WD_STYLE_TYPE.TABLE)
+    style.base_style = styles['Table Grid']
+    style.font.name = REPORT_FONT
+    style.font.size = Pt(REPORT_FONT_SIZE)
+    style.font.color.rgb = RGBColor(0, 0, 0)
+    style.element.append(parse_xml(
+        f'<w:tblStylePr {nsdecls("w")} w:type="firstRow"><w:rPr><w:b/><w:bCs/></w:rPr></w:tblStylePr>'))
+    return style
+
+def add_table_to_document(doc, df, headers=PARTICIPANTS_HEADERS):
+    """Adds the participants table (or any table in its style), writing all data rows as one
+    XML fragment.
+
+    Going through table.add_row() and cell.text per cell makes python-docx re-walk the
+    table for every row, which takes minutes for thousands of participants.
+    """
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
     table = doc.add_table(rows=1, cols=len(df.columns))
-    table.style = 'Table Grid'
+    table.style = get_participants_table_style(doc)
 
     header_cells = table.rows[0].cells
-    headers = ['Sr. No.', 'Name', 'Application ID']
     for i, header in enumerate(headers):
         header_cells[i].text = header
-        if header_cells[i].paragraphs and header_cells[i].paragraphs[0].runs:
-            run = header_cells[i].paragraphs[0].runs[0]
-            run.font.bold = True
-            run.font.name = 'Times New Roman'
-            run.font.size = Pt(12)
-            run.font.color.rgb = RGBColor(0, 0, 0)
-
-    for _, row in df.iterrows():
-        row_cells = table.add_row().cells
-        for i, value in enumerate(row):
-            row_cells[i].text = str(value)
-            if row_cells[i].paragraphs and row_cells[i].paragraphs[0].runs:
-                run = row_cells[i].paragraphs[0].runs[0]
-                run.font.name = 'Times New Roman'
-                run.font.size = Pt(12)
-                run.font.color.rgb = RGBColor(0, 0, 0)
-
-def add_formatted_heading(doc, text, size=14, level=1, center=False):
-    paragraph = doc.add_paragraph()
+
+    # Column widths come from the table grid with a fixed layout, so data cells need no tcPr
+    table.autofit = False
+    cell_template = '<w:tc><w:p><w:r><w:t xml:space="preserve">{}</w:t></w:r></w:p></w:tc>'
+
+    columns = [df[col].astype(str).map(xml_escape) for col in df.columns]
+    rows_xml = ''.join(
+        '<w:tr>' + ''.join(cell_template.format(value) for value in values) + '</w:tr>'
+        for values in zip(*columns)
+    )
+    if rows_xml:
+        rows = parse_xml(f'<w:tbl {nsdecls("w")}>{rows_xml}</w:tbl>')
+        table._tbl.extend(list(rows))
+
+def add_formatted_heading(doc, text, size=HEADING_FONT_SIZE, level=1, center=False):
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
+    apply_report_styles(doc)
+    paragraph = doc.add_paragraph(style=HEADING_STYLE)
     if center:
         paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
     run = paragraph.add_run(text)
-    run.font.name = 'Times New Roman'
-    run.font.size = Pt(size)
-    run.font.bold = True
-    run.font.color.rgb = RGBColor(0, 0, 0)
+    if size != HEADING_FONT_SIZE:
+        run.font.size = Pt(size)
+    return paragraph
 
 def add_formatted_paragraph(doc, label, value):
-    paragraph = doc.add_paragraph()
-    run = paragraph.add_run(f"{label}: ")
-    run.font.name = 'Times New Roman'
-    run.font.size = Pt(12)
-    run.font.bold = True
-    run.font.color.rgb = RGBColor(0, 0, 0)
-
-    run = paragraph.add_run(value)
-    run.font.name = 'Times New Roman'
-    run.font.size = Pt(12)
-    run.font.bold = False
-    run.font.color.rgb = RGBColor(0, 0, 0)
+    apply_report_styles(doc)
+    paragraph = doc.add_paragraph(style=BODY_STYLE)
+    paragraph.add_run(f"{label}: ", style=LABEL_STYLE)
+    paragraph.add_run(value)
+    return paragraph
@@ -0,0 +1,125 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from photo_hash import hashed_thumbnail
+from report_builder import ReportCancelled
+from telemetry import Telemetry
+from utils import make_thumbnail, warm_up_imports
+
+class ReportWorker(QThread):
+    """Runs a ReportBuilder off the GUI thread and reports each stage back to the UI."""
+
+    progress = pyqtSignal(int, int, str)
+    succeeded = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, builder, parent=None):
+        super().__init__(parent)
+        self.builder = builder
+
+    def run(self):
+        try:
+            filename = self.builder.run(self.progress.emit, self.isInterruptionRequested)
+        except ReportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(filename)
+
+class AIDraftWorker(QThread):
+    """Streams the AI summary and then the takeaways, emitting the text so far as it arrives
+    so it can be shown and edited before the report is generated."""
+
+    text_updated = pyqtSignal(str, str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, api_handler, title, description, refresh=False, parent=None):
+        super().__init__(parent)
+        self.api_handler = api_handler
+        self.title = title
+        self.description = description
+        self.refresh = refresh
+
+    def emitter(self, field):
+        def on_text(text):
+            if self.isInterruptionRequested():
+                raise ReportCancelled("AI draft cancelled")
+            self.text_updated.emit(field, text)
+        return on_text
+
+    def run(self):
+        telemetry = Telemetry(self.title)
+        status = 'failed'
+        try:
+            description = self.description
+            chunks = self.api_handler.estimate_request(description)['chunks']
+            if chunks:
+                self.emitter('summary')(f"Summarising the description in {chunks} parts...")
+                description = self.api_handler.condense(description, refresh=self.refresh,
+                                                        telemetry=telemetry)
+            self.api_handler.stream_summary(description, self.emitter('summary'),
+                                            refresh=self.refresh, telemetry=telemetry)
+            self.api_handler.stream_takeaways(description, self.emitter('takeaways'),
+                                              refresh=self.refresh, telemetry=telemetry)
+            status = 'drafted'
+        except ReportCancelled:
+            status = 'cancelled'
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            telemetry.write(status=status)
+
+class ImageIngestWorker(QThread):
+    """Makes thumbnails for the selected photos in a process pool and hands back each one as it
+    finishes, with its perceptual hashes (aHash, dHash) for near-duplicate detection. Only the
+    thumbnail is kept in memory; the Word-ready image stays on disk."""
+
+    image_ready = pyqtSignal(int, bytes, object)
+    image_failed = pyqtSignal(int, str)
+
+    def __init__(self, paths, parent=None, image_cache=None, max_workers=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.image_cache = image_cache
+        self.max_workers = max_workers
+
+    def run(self):
+        # With a cache, a miss also stores the Word-ready image from the same decode
+        make = self.image_cache.thumbnail if self.image_cache else make_thumbnail
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(hashed_thumbnail, make, path): index
+                       for index, path in enumerate(self.paths)}
+            for future in as_completed(futures):
+                index = futures[future]
+                if self.isInterruptionRequested():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return
+                try:
+                    thumbnail_bytes, hashes = future.result()
+                except Exception as e:
+                    self.image_failed.emit(index, str(e))
+                else:
+                    self.image_ready.emit(index, thumbnail_bytes, hashes)
+
+        if self.image_cache:
+            self.image_cache.evict()
+
+class StartupWorker(QThread):
+    """Configures the Gemini model and imports the heavy libraries after the window is shown."""
+
+    model_failed = pyqtSignal(str)
+
+    def __init__(self, api_handler, api_key=None, parent=None):
+        super().__init__(parent)
+        self.api_handler = api_handler
+        self.api_key = api_key
+
+    def run(self):
+        if self.api_key:
+            try:
+                self.api_handler.initialize_model(self.api_key)
+            except Exception as e:
+                self.model_failed.emit(str(e))
+        warm_up_imports()